@@ -0,0 +1,232 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from personalization import PersonalizationStore
+
+
+@dataclass
+class CohortMatrix:
+    """Topic progress for a set of students as dense users x topics arrays.
+
+    A cell is zero when the student never attempted that topic
+    (difficulty is 0 there, so it can double as the "attempted" mask).
+    """
+
+    emails: List[str]
+    topics: List[str]
+    answered: np.ndarray
+    correct: np.ndarray
+    score: np.ndarray
+    difficulty: np.ndarray
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, Any]) -> "CohortMatrix":
+        shape = (len(cols["emails"]), len(cols["topics"]))
+        rows = np.asarray(cols["user_idx"], dtype=np.int64)
+        colidx = np.asarray(cols["topic_idx"], dtype=np.int64)
+
+        def dense(values: Sequence[int]) -> np.ndarray:
+            out = np.zeros(shape, dtype=np.int64)
+            out[rows, colidx] = np.asarray(values, dtype=np.int64)
+            return out
+
+        return cls(
+            emails=list(cols["emails"]),
+            topics=list(cols["topics"]),
+            answered=dense(cols["answered"]),
+            correct=dense(cols["correct"]),
+            score=dense(cols["score"]),
+            difficulty=dense(cols["difficulty"]),
+        )
+
+    def select(self, emails: Sequence[str]) -> "CohortMatrix":
+        """Restrict to the given students (unknown emails are ignored)."""
+        index = {e: i for i, e in enumerate(self.emails)}
+        rows = [index[e] for e in dict.fromkeys(emails) if e in index]
+        return CohortMatrix(
+            emails=[self.emails[i] for i in rows],
+            topics=self.topics,
+            answered=self.answered[rows],
+            correct=self.correct[rows],
+            score=self.score[rows],
+            difficulty=self.difficulty[rows],
+        )
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    out = np.zeros(np.broadcast(num, den).shape, dtype=np.float64)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def cohort_stats(m: CohortMatrix, weakest: int = 5, min_answered: int = 1, bins: int = 10) -> Dict[str, Any]:
+    """Class-wide aggregates: per-topic accuracy, weakest topics, accuracy and difficulty distributions.
+
+    Students count towards a topic's mean accuracy only once they have
+    answered at least ``min_answered`` questions in it.
+    """
+    attempted = m.answered >= max(1, int(min_answered))
+    per_cell_acc = _ratio(m.correct, m.answered)
+
+    # Per-topic (column) aggregates
+    students_per_topic = attempted.sum(axis=0)
+    answered_per_topic = m.answered.sum(axis=0)
+    topic_accuracy = _ratio(m.correct.sum(axis=0), answered_per_topic)
+    mean_student_acc = _ratio(np.where(attempted, per_cell_acc, 0.0).sum(axis=0), students_per_topic)
+    mean_difficulty = _ratio(np.where(attempted, m.difficulty, 0).sum(axis=0), students_per_topic)
+
+    topics_out = [
+        {
+            "topic": name,
+            "students": int(students_per_topic[j]),
+            "questions_answered": int(answered_per_topic[j]),
+            "accuracy": round(float(topic_accuracy[j]), 4),
+            "mean_student_accuracy": round(float(mean_student_acc[j]), 4),
+            "mean_difficulty": round(float(mean_difficulty[j]), 2),
+        }
+        for j, name in enumerate(m.topics)
+    ]
+
+    with_data = np.flatnonzero(students_per_topic > 0)
+    order = with_data[np.argsort(mean_student_acc[with_data], kind="stable")]
+    weakest_topics = [m.topics[j] for j in order[: max(0, int(weakest))]]
+
+    # Per-student (row) overall accuracy distribution
+    student_answered = m.answered.sum(axis=1)
+    active = student_answered > 0
+    student_acc = _ratio(m.correct.sum(axis=1), student_answered)[active]
+    counts, edges = np.histogram(student_acc, bins=max(1, int(bins)), range=(0.0, 1.0))
+    if student_acc.size:
+        pct = np.percentile(student_acc, [10, 25, 50, 75, 90])
+        percentiles = {f"p{p}": round(float(v), 4) for p, v in zip((10, 25, 50, 75, 90), pct)}
+    else:
+        percentiles = {}
+
+    # Difficulty levels across every attempted (student, topic) cell
+    levels = np.clip(m.difficulty[m.answered > 0], 1, 5)
+    diff_counts = np.bincount(levels, minlength=6)[1:6]
+
+    return {
+        "students": len(m.emails),
+        "active_students": int(active.sum()),
+        "topics": topics_out,
+        "weakest_topics": weakest_topics,
+        "accuracy_distribution": {
+            "bin_edges": [round(float(e), 4) for e in edges],
+            "counts": [int(c) for c in counts],
+            "mean": round(float(student_acc.mean()), 4) if student_acc.size else 0.0,
+            "percentiles": percentiles,
+        },
+        "difficulty_histogram": {str(level): int(c) for level, c in zip(range(1, 6), diff_counts)},
+    }
+
+
+def _merge_columns(blocks: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatenate per-shard column blocks, remapping shard-local topic ids to global ones."""
+    emails: List[str] = []
+    topic_index: Dict[str, int] = {}
+    parts: Dict[str, List[np.ndarray]] = {k: [] for k in ("user_idx", "topic_idx", "answered", "correct", "score", "difficulty")}
+    for b in blocks:
+        remap = np.asarray([topic_index.setdefault(t, len(topic_index)) for t in b["topics"]], dtype=np.int64)
+        parts["user_idx"].append(np.asarray(b["user_idx"], dtype=np.int64) + len(emails))
+        parts["topic_idx"].append(remap[np.asarray(b["topic_idx"], dtype=np.int64)] if len(remap) else np.zeros(0, dtype=np.int64))
+        for k in ("answered", "correct", "score", "difficulty"):
+            parts[k].append(np.asarray(b[k], dtype=np.int64))
+        emails.extend(b["emails"])
+    cols: Dict[str, Any] = {k: (np.concatenate(v) if v else np.zeros(0, dtype=np.int64)) for k, v in parts.items()}
+    cols["emails"] = emails
+    cols["topics"] = list(topic_index)
+    return cols
+
+
+_COLUMNS = ("user_idx", "topic_idx", "answered", "correct", "score", "difficulty")
+
+
+class CohortAnalytics:
+    """Caches the cohort matrix for a store.
+
+    Column blocks are kept per storage shard, so after a write only the
+    shards whose version changed are re-exported before re-merging.
+
+    Each exported block is also written next to the shards as
+    ``columns/shard_NNN.npz``, tagged with the shard file's stamp. After a
+    restart, or when another worker rewrote a shard and already exported
+    it, the block loads from there instead of re-parsing the shard JSON.
+    Only the first build over shards with no side file (e.g. right after
+    the legacy migration) pays for parsing every shard: about a second
+    per 50k students.
+    """
+
+    def __init__(self, store: PersonalizationStore, cache_dir: Optional[str] = None):
+        self._store = store
+        self._cache_dir = cache_dir or os.path.join(store.shard_dir, "columns")
+        self._lock = threading.Lock()
+        self._blocks: Dict[int, Dict[str, Any]] = {}
+        self._matrix: Optional[CohortMatrix] = None
+
+    def _side_path(self, shard_id: int) -> str:
+        return os.path.join(self._cache_dir, f"shard_{shard_id:03d}.npz")
+
+    def _load_side(self, shard_id: int, version: Tuple[int, Any]) -> Optional[Dict[str, Any]]:
+        stamp = version[1]
+        if stamp is None:
+            return None
+        try:
+            with np.load(self._side_path(shard_id), allow_pickle=False) as z:
+                if tuple(int(x) for x in z["stamp"]) != tuple(stamp):
+                    return None
+                block: Dict[str, Any] = {k: z[k] for k in _COLUMNS}
+                block["emails"] = [str(e) for e in z["emails"]]
+                block["topics"] = [str(t) for t in z["topics"]]
+        except (OSError, KeyError, ValueError):
+            return None
+        block["version"] = version
+        return block
+
+    def _save_side(self, shard_id: int, block: Dict[str, Any]) -> None:
+        stamp = block["version"][1]
+        if stamp is None:
+            return
+        path = self._side_path(shard_id)
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    stamp=np.asarray(stamp, dtype=np.int64),
+                    emails=np.asarray(block["emails"], dtype=str),
+                    topics=np.asarray(block["topics"], dtype=str),
+                    **{k: np.asarray(block[k], dtype=np.int64) for k in _COLUMNS},
+                )
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # Read-only deployments just rebuild from the shards each start.
+            pass
+
+    def matrix(self) -> CohortMatrix:
+        with self._lock:
+            changed = False
+            for shard_id, version in enumerate(self._store.shard_versions()):
+                block = self._blocks.get(shard_id)
+                if block is not None and block["version"] == version:
+                    continue
+                block = self._load_side(shard_id, version)
+                if block is None:
+                    block = self._store.export_topic_columns(shard_id)
+                    self._save_side(shard_id, block)
+                self._blocks[shard_id] = block
+                changed = True
+            if self._matrix is None or changed:
+                blocks = [self._blocks[i] for i in sorted(self._blocks)]
+                self._matrix = CohortMatrix.from_columns(_merge_columns(blocks))
+            return self._matrix
+
+    def stats(self, emails: Optional[Sequence[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        m = self.matrix()
+        if emails:
+            m = m.select([(e or "").strip().lower() for e in emails])
+        return cohort_stats(m, **kwargs)
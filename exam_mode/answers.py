@@ -0,0 +1,29 @@
+from __future__ import annotations
+import re
+from typing import Any, NamedTuple, Optional
+
+_NON_NUMERIC = re.compile(r"[^0-9.\-]")
+
+
+class NormalizedAnswer(NamedTuple):
+    text: str
+    number: Optional[float]
+
+
+def normalize_answer(answer: Any) -> NormalizedAnswer:
+    """Comparison form of an answer: trimmed lowercase text, plus its numeric value if it has one."""
+    text = str(answer).strip().lower()
+    try:
+        number: Optional[float] = float(_NON_NUMERIC.sub("", text))
+    except ValueError:
+        number = None
+    return NormalizedAnswer(text, number)
+
+
+def answers_match(user: NormalizedAnswer, gold: Optional[NormalizedAnswer]) -> bool:
+    """Numeric equivalence when both sides are numbers, exact text match otherwise."""
+    if gold is None:
+        return False
+    if user.number is not None and gold.number is not None:
+        return user.number == gold.number
+    return user.text == gold.text
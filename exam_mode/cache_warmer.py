@@ -0,0 +1,199 @@
+from __future__ import annotations
+import math
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .exam_utils import SUBJECT_TYPE_MAP, TERMS, normalize_term, warm_papers
+from .paper_cache import cache, cache_key
+
+# Pre-populates the paper cache so the first student on a subject/term
+# after a deploy (or after the TTL) does not pay for the scrape.
+#
+# Targets are a static list (EXAM_WARM_TARGETS="Maths:Third term,Science:First term";
+# default: every SUBJECT_TYPE_MAP subject x TERMS term) plus the EXAM_WARM_TOP_N
+# most requested combinations recently seen by fetch-papers. A pass runs at
+# startup and then every EXAM_WARM_INTERVAL_SECONDS, on EXAM_WARM_CONCURRENCY
+# threads (default 1), pausing between scrapes so live requests keep priority.
+# Warm scrapes run at background priority (PDFs are extracted one at a time
+# and only while no live scrape is running), and with several workers
+# sharing the paper cache DB only the holder of a lease row runs a pass.
+
+FREQUENCY_HALF_LIFE_SECONDS = 6 * 3600
+WARM_LEASE_NAME = "paper-cache-warmer"
+# Renewed before every target, so this only bounds how long a crashed
+# worker keeps the others from warming.
+WARM_LEASE_SECONDS = 30 * 60
+
+
+def _parse_targets(spec: Optional[str]) -> List[Tuple[str, str]]:
+    if spec is None:
+        return [(subject, term) for subject in SUBJECT_TYPE_MAP for term in sorted(TERMS)]
+    targets: List[Tuple[str, str]] = []
+    for item in spec.split(","):
+        subject, sep, term = item.partition(":")
+        if sep and subject.strip() and term.strip():
+            targets.append((subject.strip(), normalize_term(term.strip())))
+    return targets
+
+
+_KNOWN_SUBJECTS = {subject.lower(): subject for subject in SUBJECT_TYPE_MAP}
+
+
+class RequestFrequency:
+    """Exponentially decayed request counts per subject/term.
+
+    Only SUBJECT_TYPE_MAP subjects x TERMS are counted: subject/term come
+    from clients, and anything else would grow the table and end up in
+    the warmer's plan.
+    """
+
+    def __init__(self, half_life_seconds: float = FREQUENCY_HALF_LIFE_SECONDS):
+        self._decay = math.log(2) / half_life_seconds
+        self._lock = threading.Lock()
+        self._scores: Dict[str, Tuple[float, float, str, str]] = {}
+
+    def record(self, subject: str, term: str) -> None:
+        subject = _KNOWN_SUBJECTS.get((subject or "").strip().lower())
+        term = normalize_term(term)
+        if subject is None or term not in TERMS:
+            return
+        now = time.time()
+        key = cache_key(subject, term)
+        with self._lock:
+            score, ts, _, _ = self._scores.get(key, (0.0, now, "", ""))
+            self._scores[key] = (score * math.exp(-self._decay * (now - ts)) + 1.0, now, subject, term)
+
+    def top(self, n: int) -> List[Tuple[str, str]]:
+        now = time.time()
+        with self._lock:
+            ranked = sorted(
+                self._scores.values(),
+                key=lambda v: v[0] * math.exp(-self._decay * (now - v[1])),
+                reverse=True,
+            )
+        return [(subject, term) for _, _, subject, term in ranked[: max(0, n)]]
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        targets: List[Tuple[str, str]],
+        frequency: RequestFrequency,
+        interval_seconds: float = 5 * 3600,
+        concurrency: int = 1,
+        top_n: int = 5,
+        pause_seconds: float = 2.0,
+    ):
+        self.targets = targets
+        self.frequency = frequency
+        self._interval = float(interval_seconds)
+        self._concurrency = max(1, int(concurrency))
+        self._top_n = top_n
+        self._pause = pause_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._passes = 0
+        self._passes_skipped = 0
+        self._scraped = 0
+        self._failed = 0
+        self._last_pass: Optional[float] = None
+
+    def plan(self) -> List[Tuple[str, str]]:
+        """Static targets first, then the most requested ones, without duplicates."""
+        seen = set()
+        out: List[Tuple[str, str]] = []
+        for subject, term in self.targets + self.frequency.top(self._top_n):
+            key = cache_key(subject, term)
+            if key not in seen:
+                seen.add(key)
+                out.append((subject, term))
+        return out
+
+    def _warm_one(self, subject: str, term: str) -> None:
+        if self._stop.is_set() or not cache.try_lease(WARM_LEASE_NAME, self._owner, WARM_LEASE_SECONDS):
+            return
+        try:
+            outcome = warm_papers(subject, term)
+        except Exception:
+            outcome = "failed"
+        if outcome == "skipped":
+            return
+        with self._lock:
+            if outcome == "scraped":
+                self._scraped += 1
+            else:
+                self._failed += 1
+        self._stop.wait(self._pause)
+
+    def run_once(self) -> None:
+        if not cache.try_lease(WARM_LEASE_NAME, self._owner, WARM_LEASE_SECONDS):
+            # Another worker is warming the shared cache.
+            with self._lock:
+                self._passes_skipped += 1
+            return
+        try:
+            plan = self.plan()
+            with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="paper-warm") as pool:
+                for subject, term in plan:
+                    pool.submit(self._warm_one, subject, term)
+        finally:
+            cache.release_lease(WARM_LEASE_NAME, self._owner)
+        with self._lock:
+            self._passes += 1
+            self._last_pass = time.time()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            if self._interval <= 0 or self._stop.wait(self._interval):
+                return
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="paper-cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "targets": len(self.plan()),
+                "passes": self._passes,
+                "passes_skipped": self._passes_skipped,
+                "scraped": self._scraped,
+                "failed": self._failed,
+                "last_pass": self._last_pass,
+                "interval_seconds": self._interval,
+                "concurrency": self._concurrency,
+            }
+
+
+request_frequency = RequestFrequency()
+cache_warmer = CacheWarmer(
+    targets=_parse_targets(os.environ.get("EXAM_WARM_TARGETS")),
+    frequency=request_frequency,
+    interval_seconds=float(os.environ.get("EXAM_WARM_INTERVAL_SECONDS", str(5 * 3600))),
+    concurrency=int(os.environ.get("EXAM_WARM_CONCURRENCY", "1")),
+    top_n=int(os.environ.get("EXAM_WARM_TOP_N", "5")),
+)
+
+
+def warming_enabled() -> bool:
+    return os.environ.get("EXAM_WARM_ENABLED", "1").strip().lower() not in ("0", "false", "no", "")
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .sqlite_file import SQLiteFile
+
+# Per-URL crawl state for conditional re-crawls of the paper site: the
+# validators (ETag / Last-Modified) and SHA-256 of the last response, plus
+# what we derived from it -- the HTML of index/term pages, or the parsed
+# questions of a PDF -- so a 304 or byte-identical PDF needs no re-parse.
+
+
+@dataclass
+class CrawlRecord:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sha256: Optional[str] = None
+    body: Optional[str] = None
+    questions: Optional[List[str]] = None
+    fetched_at: float = 0.0
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional GET."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlState:
+    """SQLite-backed CrawlRecord store. ``path=None`` (or any SQLite error) turns it into a no-op."""
+
+    def __init__(self, path: Optional[str]):
+        self._db = SQLiteFile(path, self._create_tables)
+        self._lock = threading.Lock()
+        self._counters = {"fetched": 0, "not_modified": 0, "unchanged_pdfs": 0, "parsed_pdfs": 0, "truncated_pdfs": 0}
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, sha256 TEXT,"
+            " body BLOB, questions TEXT, fetched_at REAL NOT NULL)"
+        )
+
+    def get(self, url: str) -> Optional[CrawlRecord]:
+        def op(conn: sqlite3.Connection):
+            row = conn.execute(
+                "SELECT etag, last_modified, sha256, body, questions, fetched_at FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            if not row:
+                return None
+            etag, last_modified, digest, body, questions, fetched_at = row
+            return CrawlRecord(
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+                sha256=digest,
+                body=zlib.decompress(body).decode("utf-8") if body is not None else None,
+                questions=json.loads(questions) if questions is not None else None,
+                fetched_at=fetched_at,
+            )
+
+        return self._db.run(op)
+
+    def put(self, record: CrawlRecord) -> None:
+        body = zlib.compress(record.body.encode("utf-8")) if record.body is not None else None
+        questions = json.dumps(record.questions, ensure_ascii=False) if record.questions is not None else None
+
+        def op(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT OR REPLACE INTO urls (url, etag, last_modified, sha256, body, questions, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.url, record.etag, record.last_modified, record.sha256, body, questions, time.time()),
+            )
+            conn.commit()
+
+        self._db.run(op)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def clear(self) -> None:
+        def op(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM urls")
+            conn.commit()
+
+        self._db.run(op)
+
+    def stats(self) -> Dict[str, Any]:
+        urls = self._db.run(lambda conn: conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0])
+        with self._lock:
+            return {"enabled": self._db.enabled, "urls": urls or 0, **self._counters}
+
+
+# Set EXAM_CRAWL_STATE_PATH to an empty string to always re-crawl in full.
+_STATE_PATH = os.environ.get(
+    "EXAM_CRAWL_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_state.sqlite3"),
+)
+crawl_state = CrawlState(_STATE_PATH or None)
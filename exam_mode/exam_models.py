@@ -20,6 +20,7 @@ class FetchPapersRequest(BaseModel):
     session_id: str
     subject: str
     term: str
+    background: bool = Field(False, description="Return a job id instead of waiting for a scrape")
 
 
 class PaperQuestion(BaseModel):
@@ -31,13 +32,31 @@ class PaperQuestion(BaseModel):
     type: str = Field(..., description="Question type e.g., algebra, mcq, essay")
     choices: Optional[List[str]] = None
     answer: Optional[str] = Field(None, description="Gold answer for evaluation (if known)")
+    years: Optional[List[int]] = Field(None, description="Every paper year this (near-duplicate) question appeared in")
 
 
 class FetchPapersResponse(BaseModel):
     session_id: str
     papers: Dict[int, int] = Field(..., description="year -> question_count")
     total_questions: int
+    unbounded: bool = Field(False, description="True for the synthetic fallback stream, which never runs out")
     message: str
+    status: str = Field("done", description="done, or queued/running for a background fetch")
+    job_id: Optional[str] = Field(None, description="Poll /exam-mode/jobs/{job_id} while status is not done")
+
+
+class FetchJobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, done or failed")
+    subject: str
+    term: str
+    papers: Dict[int, int] = Field(default_factory=dict, description="year -> question_count")
+    total_questions: int = 0
+    unbounded: bool = False
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 
 class AskQuestionRequest(BaseModel):
@@ -50,6 +69,29 @@ class AskQuestionResponse(BaseModel):
     progress: Dict[str, Any]
 
 
+class AskQuestionsRequest(BaseModel):
+    session_id: str
+    count: int = Field(10, ge=1, le=100, description="How many questions to draw")
+
+
+class QuestionPrompt(BaseModel):
+    """A question as shown to the student (no gold answer)."""
+    id: str
+    year: int
+    subject: str
+    term: str
+    text: str
+    type: str
+    choices: Optional[List[str]] = None
+    years: Optional[List[int]] = None
+
+
+class AskQuestionsResponse(BaseModel):
+    session_id: str
+    questions: List[QuestionPrompt]
+    progress: Dict[str, Any]
+
+
 class EvaluateRequest(BaseModel):
     session_id: str
     question_id: str
@@ -73,6 +115,39 @@ class EvaluateResponse(BaseModel):
     progress: Dict[str, Any] = {}
 
 
+class SubmittedAnswer(BaseModel):
+    question_id: str
+    user_answer: str
+
+
+class SubmitPaperRequest(BaseModel):
+    session_id: str
+    answers: List[SubmittedAnswer]
+
+
+class QuestionResult(BaseModel):
+    question_id: str
+    found: bool = True
+    correct: bool
+    duplicate: bool = False
+    points_awarded: int = 0
+    correct_answer: Optional[str] = None
+    type: Optional[str] = None
+
+
+class SubmitPaperResponse(BaseModel):
+    session_id: str
+    submitted: int
+    graded: int
+    correct: int
+    score_percent: float
+    points_awarded: int
+    badges_earned: List[str] = []
+    results: List[QuestionResult]
+    mastery_steps: Dict[str, List[TeachingStep]] = Field(default_factory=dict, description="question type -> steps, for types answered incorrectly")
+    progress: Dict[str, Any] = {}
+
+
 class ProgressSnapshot(BaseModel):
     session_id: str
     points: int
@@ -3,11 +3,17 @@ from typing import Dict
 
 from .exam_models import (
     StartExamRequest, StartExamResponse,
-    FetchPapersRequest, FetchPapersResponse,
+    FetchPapersRequest, FetchPapersResponse, FetchJobStatus,
     AskQuestionRequest, AskQuestionResponse,
+    AskQuestionsRequest, AskQuestionsResponse,
     EvaluateRequest, EvaluateResponse,
+    SubmitPaperRequest, SubmitPaperResponse,
 )
 from .exam_service import exam_service
+from .cache_warmer import cache_warmer
+from .crawl_state import crawl_state
+from .paper_cache import cache as paper_cache
+from .paper_jobs import JobQueueFull
 
 router = APIRouter(prefix="/exam-mode", tags=["Exam Mode"])
 
@@ -21,13 +27,34 @@ def start_exam(req: StartExamRequest):
 @router.post("/fetch-papers", response_model=FetchPapersResponse)
 def fetch_papers(req: FetchPapersRequest):
     try:
-        papers = exam_service.fetch_papers(req.session_id, subject=req.subject, term=req.term)
+        if req.background:
+            papers, job = exam_service.fetch_papers_background(req.session_id, subject=req.subject, term=req.term)
+            if job is not None:
+                return FetchPapersResponse(
+                    session_id=req.session_id, papers={}, total_questions=0,
+                    message="Fetching papers in the background.", status=job.status, job_id=job.job_id,
+                )
+        else:
+            papers = exam_service.fetch_papers(req.session_id, subject=req.subject, term=req.term)
     except KeyError:
         raise HTTPException(status_code=404, detail="Invalid session")
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    counts: Dict[int, int] = {y: len(qs) for y, qs in papers.items()}
+    counts: Dict[int, int] = papers.year_counts()
     total = sum(counts.values())
-    return FetchPapersResponse(session_id=req.session_id, papers=counts, total_questions=total, message="Papers loaded.")
+    return FetchPapersResponse(
+        session_id=req.session_id, papers=counts, total_questions=total,
+        unbounded=papers.unbounded, message="Papers loaded.",
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=FetchJobStatus)
+def fetch_job_status(job_id: str):
+    status = exam_service.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return FetchJobStatus(**status)
 
 
 @router.post("/ask-question", response_model=AskQuestionResponse)
@@ -41,6 +68,17 @@ def ask_question(req: AskQuestionRequest):
     return AskQuestionResponse(session_id=req.session_id, question=q, progress=progress)
 
 
+@router.post("/ask-questions", response_model=AskQuestionsResponse)
+def ask_questions(req: AskQuestionsRequest):
+    try:
+        questions = exam_service.next_questions(req.session_id, req.count)
+        progress = exam_service.progress_snapshot(req.session_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return AskQuestionsResponse(session_id=req.session_id, questions=questions, progress=progress)
+
+
 @router.post("/evaluate", response_model=EvaluateResponse)
 def evaluate(req: EvaluateRequest):
     try:
@@ -49,3 +87,20 @@ def evaluate(req: EvaluateRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
     return EvaluateResponse(session_id=req.session_id, **result)
+
+
+@router.post("/submit-paper", response_model=SubmitPaperResponse)
+def submit_paper(req: SubmitPaperRequest):
+    try:
+        result = exam_service.submit_paper(req.session_id, ((a.question_id, a.user_answer) for a in req.answers))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Invalid session")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return SubmitPaperResponse(session_id=req.session_id, **result)
+
+
+@router.get("/stats")
+def stats():
+    return {"paper_cache": paper_cache.stats(), "sessions": exam_service.stats(), "crawl": crawl_state.stats(), "fetch_jobs": exam_service.jobs.stats(), "warmer": cache_warmer.stats()}
@@ -1,59 +1,116 @@
 from __future__ import annotations
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+import os
+import time
 import uuid
 
-from .exam_utils import scrape_papers, random_question_from_papers, is_correct, mastery_teaching_steps, badge_for_type
+from .answers import answers_match, normalize_answer
+from .cache_warmer import request_frequency
+from .exam_utils import cached_papers, scrape_papers, mastery_teaching_steps, badge_for_type
+from .paper_cache import cache, cache_key
+from .paper_jobs import PaperJob, PaperJobQueue
+from .paper_set import PaperSet
+from .question_deck import QuestionDeck
+from .session_store import SessionState, SessionStore, make_session_store
 
 
-@dataclass
-class SessionState:
-    session_id: str
-    mode: str
-    term: str
-    subject: str
-    papers: Dict[int, List[dict]] = field(default_factory=dict)
-    used_question_ids: set = field(default_factory=set)
-    points: int = 0
-    streak: int = 0
-    badges: set = field(default_factory=set)
-    readiness_percent: int = 0
-    last_question: Optional[dict] = None
-    last_updated: datetime = field(default_factory=datetime.utcnow)
+class ExamService:
+    def __init__(
+        self,
+        max_sessions: int = int(os.environ.get("EXAM_MAX_SESSIONS", "5000")),
+        idle_ttl_seconds: float = float(os.environ.get("EXAM_SESSION_IDLE_SECONDS", str(2 * 3600))),
+        sweep_interval: float = 60.0,
+        store: Optional[SessionStore] = None,
+    ):
+        # Memory by default; EXAM_SESSION_STORE=sqlite shares sessions across workers.
+        self.store = store or make_session_store(scrape_papers, max_sessions, idle_ttl_seconds)
+        # Background paper fetches (fetch-papers with background=true); their
+        # status is shared with other workers through the paper cache DB.
+        self.jobs = PaperJobQueue(scrape_papers, cache_key, status_store=cache)
+        self._sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
 
+    def purge_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL; returns how many were removed."""
+        self._last_sweep = time.monotonic()
+        return self.store.purge_expired()
 
-class ExamService:
-    def __init__(self):
-        # Simple in-memory session store
-        self.sessions: Dict[str, SessionState] = {}
+    def _maybe_purge(self) -> None:
+        if time.monotonic() - self._last_sweep >= self._sweep_interval:
+            self.purge_expired()
 
     # Session Management
     def start_session(self, mode: str, term: str, subject: str, session_id: Optional[str] = None) -> SessionState:
         sid = session_id or str(uuid.uuid4())
         state = SessionState(session_id=sid, mode=mode, term=term, subject=subject)
-        self.sessions[sid] = state
+        self._maybe_purge()
+        self.store.put(state)
         return state
 
     def get_session(self, session_id: str) -> SessionState:
-        if session_id not in self.sessions:
+        self._maybe_purge()
+        state = self.store.get(session_id)
+        if state is None:
             raise KeyError("Invalid session_id")
-        return self.sessions[session_id]
+        return state
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
 
     # Data loading
-    def fetch_papers(self, session_id: str, subject: Optional[str] = None, term: Optional[str] = None) -> Dict[int, List[dict]]:
+    def fetch_papers(self, session_id: str, subject: Optional[str] = None, term: Optional[str] = None) -> PaperSet:
         state = self.get_session(session_id)
         if subject:
             state.subject = subject
         if term:
             state.term = term
+        request_frequency.record(state.subject, state.term)
         papers = scrape_papers(state.subject, state.term)
+        self._load_papers(state, papers)
+        return papers
+
+    def _load_papers(self, state: SessionState, papers: PaperSet) -> None:
         state.papers = papers
         # reset tracking when (re)loading papers
-        state.used_question_ids.clear()
-        state.last_question = None
+        state.deck = QuestionDeck.for_papers(papers)
+        state.last_index = None
         state.last_updated = datetime.utcnow()
-        return papers
+        self.store.put(state)
+
+    def fetch_papers_background(
+        self, session_id: str, subject: Optional[str] = None, term: Optional[str] = None
+    ) -> Tuple[Optional[PaperSet], Optional[PaperJob]]:
+        """Load papers without blocking on a scrape.
+
+        Returns (papers, None) when they can be served from the bank or
+        cache right away; otherwise (None, job) for a background fetch that
+        loads the papers into the session when it finishes. Sessions asking
+        for the same subject/term share the in-flight job.
+        """
+        state = self.get_session(session_id)
+        if subject:
+            state.subject = subject
+        if term:
+            state.term = term
+        request_frequency.record(state.subject, state.term)
+        papers = cached_papers(state.subject, state.term)
+        if papers is not None:
+            self._load_papers(state, papers)
+            return papers, None
+        self.store.put(state)
+        wanted = (state.subject, state.term)
+
+        def attach(loaded: PaperSet) -> None:
+            current = self.store.get(session_id)
+            # Skip if the session is gone or has since switched subject/term.
+            if current is not None and (current.subject, current.term) == wanted:
+                self._load_papers(current, loaded)
+
+        return None, self.jobs.submit(state.subject, state.term, on_done=attach)
+
+    def job_status(self, job_id: str) -> Optional[dict]:
+        return self.jobs.status(job_id)
 
     # Question flow
     def next_question(self, session_id: str) -> dict:
@@ -61,33 +118,60 @@ class ExamService:
         if not state.papers:
             raise RuntimeError("Papers not loaded for session")
 
-        # Try to find a question not used yet; fallback if all used
-        all_questions = [q for year in state.papers for q in state.papers[year]]
-        remaining = [q for q in all_questions if q["id"] not in state.used_question_ids]
-        if not remaining:
-            remaining = all_questions
-            state.used_question_ids.clear()
-        q = random_question_from_papers({q["year"]: [q] for q in remaining}) if remaining else random_question_from_papers(state.papers)
-        state.last_question = q
-        state.used_question_ids.add(q["id"])
+        if state.deck is None:
+            state.deck = QuestionDeck.for_papers(state.papers)
+        # Questions don't repeat until all have been used; then the deck reshuffles.
+        state.last_index = state.deck.draw(state.papers)
+        state.last_updated = datetime.utcnow()
+        self.store.put(state)
+        return state.papers.question(state.last_index)
+
+    def next_questions(self, session_id: str, count: int) -> List[dict]:
+        """Next ``count`` questions in one call, without repeats and with answers stripped.
+
+        The batch is capped at the paper size and marked used, like ``count``
+        calls to ``next_question``. A batch that runs past the end of the
+        deck continues into the reshuffled round, skipping its own questions.
+        """
+        state = self.get_session(session_id)
+        papers = state.papers
+        if not papers:
+            raise RuntimeError("Papers not loaded for session")
+        if state.deck is None:
+            state.deck = QuestionDeck.for_papers(papers)
+
+        picked: List[int] = []
+        seen = set()
+        while len(picked) < min(count, papers.question_count):
+            index = state.deck.draw(papers)
+            if index not in seen:
+                seen.add(index)
+                picked.append(index)
+        state.last_index = picked[0] if picked else state.last_index
         state.last_updated = datetime.utcnow()
-        return q
+        self.store.put(state)
+
+        questions = []
+        for index in picked:
+            q = papers.question(index)
+            q.pop("answer", None)
+            questions.append(q)
+        return questions
 
     # Evaluation
     def evaluate(self, session_id: str, question_id: str, user_answer: str) -> dict:
         state = self.get_session(session_id)
-        if not state.last_question or state.last_question.get("id") != question_id:
+        papers = state.papers
+        if papers is not None and (state.last_index is None or papers.questions[state.last_index].get("id") != question_id):
             # Try to locate question by id in papers
-            for year, qs in state.papers.items():
-                for q in qs:
-                    if q["id"] == question_id:
-                        state.last_question = q
-                        break
+            found = self._index_of(state, question_id)
+            if found is not None:
+                state.last_index = found
         q = state.last_question
         if not q:
             raise RuntimeError("Question not found in session")
 
-        correct = is_correct(user_answer, q.get("answer"))
+        correct = self._grade(papers, state.last_index, user_answer)
         points_awarded = 0
         badge_earned = None
         explanation = None
@@ -105,15 +189,9 @@ class ExamService:
             mastery_steps = [{"title": t, "content": c} for t, c in steps]
             state.streak = 0
             # Provide focused practice by asking another of same type next
-            same_type = []
-            for year, qs in state.papers.items():
-                for cand in qs:
-                    if cand.get("type") == q.get("type") and cand["id"] not in state.used_question_ids:
-                        same_type.append(cand)
-            if same_type:
-                nxt = random_question_from_papers({cand["year"]: [cand] for cand in same_type})
-                state.last_question = nxt
-                state.used_question_ids.add(nxt["id"])
+            nxt = state.deck.draw_same_type(papers, q.get("type")) if state.deck else None
+            if nxt is not None:
+                state.last_index = nxt
 
         # Badges
         if correct:
@@ -127,6 +205,7 @@ class ExamService:
                 badge_earned = badge_name
 
         state.last_updated = datetime.utcnow()
+        self.store.put(state)
         return {
             "correct": correct,
             "points_awarded": points_awarded,
@@ -142,6 +221,104 @@ class ExamService:
             },
         }
 
+    @staticmethod
+    def _index_of(state: SessionState, question_id: str) -> Optional[int]:
+        """Index of a client-supplied question id, or None.
+
+        Any ``syn-<N>`` parses on an unbounded stream, so there only
+        questions this session was actually served are accepted.
+        """
+        index = state.papers.index_of(question_id)
+        if index is not None and state.papers.unbounded and (state.deck is None or not state.deck.is_used(index)):
+            return None
+        return index
+
+    @staticmethod
+    def _grade(papers: Optional[PaperSet], index: Optional[int], user_answer: str) -> bool:
+        # Gold answers are normalized once when the paper set is built.
+        if papers is None or index is None:
+            return False
+        return answers_match(normalize_answer(user_answer), papers.gold_answers[index])
+
+    def submit_paper(self, session_id: str, answers: Iterable[Tuple[str, str]]) -> dict:
+        """Grade a whole paper of (question_id, user_answer) pairs in one pass.
+
+        Points, streak, badges and readiness move exactly as if each answer
+        had been sent to ``evaluate`` in order; a question answered twice is
+        graded once. Submitted questions are marked used.
+        """
+        state = self.get_session(session_id)
+        papers = state.papers
+        if not papers:
+            raise RuntimeError("Papers not loaded for session")
+        if state.deck is None:
+            state.deck = QuestionDeck.for_papers(papers)
+
+        results: List[dict] = []
+        seen = set()
+        correct_count = 0
+        points_awarded = 0
+        badges_earned: List[str] = []
+        weak_types: List[str] = []
+        for question_id, user_answer in answers:
+            index = self._index_of(state, question_id)
+            if index is None or index in seen:
+                results.append({"question_id": question_id, "found": index is not None, "correct": False, "duplicate": index is not None})
+                continue
+            seen.add(index)
+            state.deck.mark_used(index)
+            q = papers.questions[index]
+            qtype = q.get("type") or "general"
+            correct = self._grade(papers, index, user_answer)
+            awarded = 0
+            if correct:
+                correct_count += 1
+                state.streak += 1
+                awarded = 10 + min(state.streak * 2, 10)
+                state.readiness_percent = min(100, state.readiness_percent + 2)
+                badge_name = badge_for_type(qtype)
+                if state.streak >= 3 and badge_name not in state.badges:
+                    state.badges.add(badge_name)
+                    badges_earned.append(badge_name)
+            else:
+                state.streak = 0
+                if qtype not in weak_types:
+                    weak_types.append(qtype)
+            points_awarded += awarded
+            results.append({
+                "question_id": question_id,
+                "found": True,
+                "correct": correct,
+                "points_awarded": awarded,
+                "correct_answer": q.get("answer"),
+                "type": qtype,
+            })
+        state.points += points_awarded
+        state.last_index = None
+        state.last_updated = datetime.utcnow()
+        self.store.put(state)
+
+        graded = len(seen)
+        return {
+            "submitted": len(results),
+            "graded": graded,
+            "correct": correct_count,
+            "score_percent": round(100.0 * correct_count / graded, 1) if graded else 0.0,
+            "points_awarded": points_awarded,
+            "badges_earned": badges_earned,
+            "results": results,
+            "mastery_steps": {
+                t: [{"title": title, "content": content} for title, content in mastery_teaching_steps(t)]
+                for t in weak_types
+            },
+            "progress": {
+                "points": state.points,
+                "streak": state.streak,
+                "badges": list(state.badges),
+                "readiness_percent": state.readiness_percent,
+            },
+        }
+
     def progress_snapshot(self, session_id: str) -> dict:
         s = self.get_session(session_id)
         return {
@@ -3,17 +3,7 @@ from dataclasses import dataclass
 from typing import List
 
 from .exam_messages import get_setup_questions
-
-
-TRIGGER_PHRASES = [
-    "prepare me for my exam",
-    "prepare me for my third exam",
-    "enable exam mode",
-    "turn on exam mode",
-    "i want to practice for my exam",
-    "practice for my exam",
-    "start exam mode",
-]
+from .intent_matcher import TRIGGER_PHRASES, matcher  # noqa: F401  (TRIGGER_PHRASES re-exported)
 
 
 @dataclass
@@ -25,12 +15,11 @@ class ExamTriggerResult:
 def detect_exam_trigger(user_text: str) -> ExamTriggerResult:
     """Detect if user text should activate Exam Mode.
 
-    Matching is case-insensitive and substring-based for robustness.
+    Matching is case-insensitive and substring-based for robustness; all
+    trigger phrases are matched in one pass (see intent_matcher).
     """
     if not user_text:
         return ExamTriggerResult(triggered=False)
-    text = user_text.strip().lower()
-    for phrase in TRIGGER_PHRASES:
-        if phrase in text:
-            return ExamTriggerResult(triggered=True, setup_questions=get_setup_questions())
+    if matcher.analyze(user_text).exam_trigger:
+        return ExamTriggerResult(triggered=True, setup_questions=get_setup_questions())
     return ExamTriggerResult(triggered=False)
@@ -1,10 +1,14 @@
 import random
-import re
-from typing import Dict, List, Tuple
+import zlib
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .answers import answers_match, normalize_answer
+from .paper_set import PaperSet, intern_papers
+from .synthetic_stream import SyntheticQuestionStream
 
 # Helper utilities for Exam Mode.
 # scrape_papers() now attempts real scraping via paperswiki.com with caching (lazy imports),
-# and falls back to a synthetic generator if scraping fails.
+# and falls back to an unbounded synthetic question stream if scraping fails.
 
 SUBJECT_TYPE_MAP = {
     "Maths": ["algebra", "geometry", "number_theory", "probability"],
@@ -23,89 +27,192 @@ def normalize_term(term: str) -> str:
     return term
 
 
-def scrape_papers(subject: str, term: str) -> Dict[int, List[Dict]]:
+# Cache lifetimes for paper sets. Past its TTL an entry is still served as
+# stale for STALE_SECONDS while one background scrape refreshes it.
+PAPER_TTL_SECONDS = 6 * 3600
+PARTIAL_TTL_SECONDS = 10 * 60
+FALLBACK_TTL_SECONDS = 30 * 60
+STALE_SECONDS = 24 * 3600
+RETRY_AFTER_FAILURE_SECONDS = 10 * 60
+
+
+def scrape_papers(subject: str, term: str) -> PaperSet:
     """
     Try dynamic scrape from paperswiki.com with caching.
     On failure (including missing libs), fall back to synthetic generation.
-    Returns: {year: [{id, year, subject, term, text, type, choices, answer}, ...]}
+    Returns an immutable, interned PaperSet reading as
+    {year: ({id, year, subject, term, text, type, choices, answer}, ...)}
+
+    An offline question bank (see question_bank.py) is consulted first.
+    Concurrent misses for the same subject/term share one scrape, and an
+    expired set is returned immediately while it is re-scraped in the background.
     """
+    cached = cached_papers(subject, term)
+    if cached is not None:
+        return cached
     # Lazy import to avoid hard dependency unless used
     try:
-        from .paper_cache import cache, cache_key  # type: ignore
-        from .paper_scraper import scrape_papers_dynamic  # type: ignore
+        from .paper_cache import cache_key, flights  # type: ignore
+    except Exception:
+        return _load_papers(subject, term)
+    return flights.do(cache_key(subject, term), lambda: _load_papers(subject, term))
+
+
+def cached_papers(subject: str, term: str) -> Optional[PaperSet]:
+    """The paper set if it can be served without scraping (question bank or paper cache), else None."""
+    try:
+        from .question_bank import get_question_bank  # type: ignore
+        bank = get_question_bank()
+    except Exception:
+        bank = None
+    if bank is not None:
+        banked = bank.lookup(subject, term)
+        if banked:
+            return banked
+
+    try:
+        from .paper_cache import cache, cache_key, flights  # type: ignore
+    except Exception:
+        return None
+
+    ck = cache_key(subject, term)
+    cached, stale = cache.get_entry(ck)
+    if not cached:
+        return None
+    cached = _as_paper_set(subject, term, cached)
+    if stale:
+        flights.do_async(ck, lambda: _refresh_papers(subject, term, cached))
+    return cached
+
+
+def warm_papers(subject: str, term: str) -> str:
+    """Make sure a fresh paper set is cached: "scraped", "failed" or "skipped".
+
+    Unlike scrape_papers, a stale entry is refreshed synchronously (on the
+    caller's thread) as a background-priority scrape, which yields the PDF
+    pool to live requests. A failed warm caches nothing: the stale set
+    stays as it is, and the synthetic fallback is left to live requests.
+    A key that is already being scraped is left alone.
+
+    Warms run under their own flight key, so a live request arriving
+    meanwhile scrapes at live priority instead of waiting on (and
+    inheriting the failure of) the background scrape.
+    """
+    try:
+        from .question_bank import get_question_bank  # type: ignore
+        bank = get_question_bank()
+    except Exception:
+        bank = None
+    if bank is not None and bank.lookup(subject, term):
+        return "skipped"
+    try:
+        from .paper_cache import cache, cache_key, flights  # type: ignore
     except Exception:
-        cache = None
-        cache_key = None
-        scrape_papers_dynamic = None  # type: ignore
-
-    # Attempt cache first
-    if cache and cache_key:
-        ck = cache_key(subject, term)
-        cached = cache.get(ck)
-        if cached:
-            return cached
-
-    # Try dynamic scrape
-    if scrape_papers_dynamic:
+        return "skipped"
+
+    ck = cache_key(subject, term)
+    warm_key = "warm:" + ck
+    if flights.in_flight(ck) or flights.in_flight(warm_key):
+        return "skipped"
+    cached, stale = cache.get_entry(ck)
+    if cached and not stale:
+        return "skipped"
+    outcome: List[bool] = []
+
+    def run() -> None:
         try:
-            data = scrape_papers_dynamic(subject, term)
-            if cache and cache_key:
-                cache.set(cache_key(subject, term), data, ttl_seconds=6 * 3600)
-            return data
+            # A background scrape raises rather than return a partial set.
+            data = _as_paper_set(subject, term, _scrape_dynamic(subject, term, background=True)[0])
         except Exception:
-            # proceed to fallback
-            pass
+            outcome.append(False)
+            return
+        _cache_papers(subject, term, data, PAPER_TTL_SECONDS)
+        outcome.append(True)
 
-    # Fallback: synthetic generation
-    term_norm = normalize_term(term)
-    topics = SUBJECT_TYPE_MAP.get(subject, ["general"])
-    years = [2019, 2020, 2023]
-    data: Dict[int, List[Dict]] = {}
-    qid = 1
-    for y in years:
-        questions = []
-        for idx, tp in enumerate(topics):
-            is_mcq = (idx % 2 == 0)
-            if is_mcq:
-                a, b = random.randint(1, 9), random.randint(1, 9)
-                correct = str(a + b)
-                opts = [correct, str(a + b + 1), str(a + b - 1), str(a + b + 2)]
-                random.shuffle(opts)
-                text = f"[{tp.upper()}] What is {a} + {b}?"
-                q = {
-                    "id": f"{y}-{qid}",
-                    "year": y,
-                    "subject": subject,
-                    "term": term_norm,
-                    "text": text,
-                    "type": tp,
-                    "choices": opts,
-                    "answer": correct,
-                }
-            else:
-                a, b = random.randint(2, 12), random.randint(2, 12)
-                correct = str(a * b)
-                text = f"[{tp.upper()}] Compute {a} x {b}"
-                q = {
-                    "id": f"{y}-{qid}",
-                    "year": y,
-                    "subject": subject,
-                    "term": term_norm,
-                    "text": text,
-                    "type": tp,
-                    "choices": None,
-                    "answer": correct,
-                }
-            questions.append(q)
-            qid += 1
-        data[y] = questions
-
-    if cache and cache_key:
-        cache.set(cache_key(subject, term), data, ttl_seconds=30 * 60)
+    flights.do(warm_key, run)
+    if not outcome:
+        return "skipped"  # another warm of the same key ran the scrape
+    return "scraped" if outcome[0] else "failed"
+
+
+def _paper_set_key(subject: str, term: str) -> str:
+    try:
+        from .paper_cache import cache_key  # type: ignore
+    except Exception:
+        return f"papers:{subject}:{term}"
+    return cache_key(subject, term)
+
+
+def _as_paper_set(subject: str, term: str, papers: Mapping) -> PaperSet:
+    if isinstance(papers, PaperSet):
+        return papers
+    return intern_papers(_paper_set_key(subject, term), papers)
+
+
+def _scrape_dynamic(subject: str, term: str, background: bool = False) -> Tuple[Dict[int, List[Dict]], bool]:
+    """Scraped papers, and whether the scrape finished before its deadline."""
+    try:
+        from .paper_scraper import PartialPapers, scrape_papers_dynamic  # type: ignore
+    except Exception as e:
+        raise RuntimeError("Scraper dependencies are not installed") from e
+    papers = scrape_papers_dynamic(subject, term, background=background)
+    return papers, not isinstance(papers, PartialPapers)
+
+
+def _cache_papers(subject: str, term: str, data: PaperSet, ttl_seconds: int) -> None:
+    try:
+        from .paper_cache import cache, cache_key  # type: ignore
+    except Exception:
+        return
+    cache.set(cache_key(subject, term), data, ttl_seconds=ttl_seconds, stale_seconds=STALE_SECONDS)
+
+
+def _scrape_into_cache(subject: str, term: str, stale: Optional[PaperSet] = None) -> PaperSet:
+    """Scrape and cache a paper set.
+
+    A scrape cut short by its deadline is served but cached only for
+    PARTIAL_TTL_SECONDS, so it is soon scraped again (a stale set being
+    refreshed is kept instead). On failure a stale set is kept and
+    retried later; without one the synthetic stream is cached for a short while.
+    """
+    try:
+        scraped, complete = _scrape_dynamic(subject, term)
+        if complete or stale is None:
+            data = _as_paper_set(subject, term, scraped)
+            _cache_papers(subject, term, data, PAPER_TTL_SECONDS if complete else PARTIAL_TTL_SECONDS)
+            return data
+    except Exception:
+        pass
+    if stale is not None:
+        _cache_papers(subject, term, stale, RETRY_AFTER_FAILURE_SECONDS)
+        return stale
+    data = intern_papers(_paper_set_key(subject, term), synthetic_stream(subject, term))
+    _cache_papers(subject, term, data, FALLBACK_TTL_SECONDS)
     return data
 
 
-def random_question_from_papers(papers: Dict[int, List[Dict]]) -> Dict:
+def _load_papers(subject: str, term: str) -> PaperSet:
+    """Scrape (or synthesize on failure) and cache a paper set."""
+    return _scrape_into_cache(subject, term)
+
+
+def _refresh_papers(subject: str, term: str, stale: PaperSet) -> PaperSet:
+    """Background refresh: on failure keep serving the stale set and retry later."""
+    return _scrape_into_cache(subject, term, stale)
+
+
+def synthetic_stream(subject: str, term: str) -> SyntheticQuestionStream:
+    """Fallback question stream used when scraping is unavailable.
+
+    Unbounded and seeded from the subject/term, so every worker serves the
+    same questions in the same order and a long session never runs dry.
+    """
+    term_norm = normalize_term(term)
+    seed = zlib.crc32(f"{subject}|{term_norm}".encode("utf-8"))
+    return SyntheticQuestionStream(subject, term_norm, SUBJECT_TYPE_MAP.get(subject, ["general"]), seed)
+
+
+def random_question_from_papers(papers: Mapping[int, List[Dict]]) -> Dict:
     years = list(papers.keys())
     if not years:
         raise ValueError("No papers loaded")
@@ -117,13 +224,8 @@ def random_question_from_papers(papers: Dict[int, List[Dict]]) -> Dict:
 def is_correct(user_answer: str, correct_answer: str) -> bool:
     if correct_answer is None:
         return False
-    ua = str(user_answer).strip().lower()
-    ca = str(correct_answer).strip().lower()
     # Allow numeric equivalence
-    try:
-        return float(re.sub(r"[^0-9.\-]", "", ua)) == float(re.sub(r"[^0-9.\-]", "", ca))
-    except Exception:
-        return ua == ca
+    return answers_match(normalize_answer(user_answer), normalize_answer(correct_answer))
 
 
 def mastery_teaching_steps(q_type: str) -> List[Tuple[str, str]]:
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# One Aho-Corasick automaton over every phrase the chat backend reacts to:
+# Exam Mode triggers and subject names/aliases (English and Sinhala). A
+# message is classified in a single pass.
+
+TRIGGER_PHRASES = [
+    "prepare me for my exam",
+    "prepare me for my third exam",
+    "enable exam mode",
+    "turn on exam mode",
+    "i want to practice for my exam",
+    "practice for my exam",
+    "start exam mode",
+    # No bare "exam mode": it would also match "turn off exam mode".
+    "විභාගයට සූදානම්",
+]
+
+# Grade 9 subjects and the names students use for them.
+SUBJECT_ALIASES: Dict[str, List[str]] = {
+    "Maths": ["math", "maths", "mathematics", "ගණිතය", "ගණිත"],
+    "Science": ["science", "විද්‍යාව", "විද්‍යා"],
+    "English": ["english", "ඉංග්‍රීසි"],
+    "Sinhala": ["sinhala", "සිංහල"],
+    "History": ["history", "ඉතිහාසය"],
+    "Geography": ["geography", "භූගෝල විද්‍යාව", "භූගෝලය"],
+    "Health": ["health", "සෞඛ්‍ය"],
+    "Civics": ["civics", "civic education", "පුරවැසි අධ්‍යාපනය"],
+}
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200c\u200d"))
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Casefold, drop zero-width joiners (Sinhala conjuncts are typed both ways), collapse whitespace."""
+    return _SPACES.sub(" ", (text or "").translate(_ZERO_WIDTH).casefold()).strip()
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; ``find`` is linear in the text plus the matches."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), payload))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, payload) for every pattern occurrence in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+@dataclass
+class Intent:
+    exam_trigger: bool = False
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class IntentMatcher:
+    def __init__(
+        self,
+        triggers: Iterable[str] = TRIGGER_PHRASES,
+        subjects: Optional[Dict[str, List[str]]] = None,
+    ):
+        patterns: List[Tuple[str, object]] = [(normalize(p), ("trigger", p)) for p in triggers]
+        for name, aliases in (subjects if subjects is not None else SUBJECT_ALIASES).items():
+            patterns.extend((normalize(a), ("subject", name)) for a in [name, *aliases])
+        self._automaton = AhoCorasick(patterns)
+
+    def _matches(self, text: str) -> Iterator[Tuple[int, int, str, str]]:
+        for start, end, (kind, value) in self._automaton.find(text):
+            # Trigger phrases match as substrings ("practice for my exams"), like
+            # the frontend's includes(); subject aliases must sit on word
+            # boundaries ("math" not in "aftermath").
+            if kind == "subject":
+                if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+                    continue
+            yield start, end, kind, value
+
+    def analyze(self, text: str) -> Intent:
+        intent = Intent()
+        for _start, _end, kind, _value in self._matches(normalize(text)):
+            if kind == "trigger":
+                intent.exam_trigger = True
+                break
+        return intent
+
+    def canonical_subject(self, name: str) -> Optional[str]:
+        """Subject a whole field names (e.g. "mathematics" or "ගණිතය" -> "Maths"), if any."""
+        text = normalize(name)
+        for start, end, kind, value in self._matches(text):
+            if kind == "subject" and start == 0 and end == len(text):
+                return value
+        return None
+
+
+matcher = IntentMatcher()
@@ -1,46 +1,454 @@
 from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+from .paper_set import PaperSet, StreamPaperSet, intern_papers
+from .sqlite_file import SQLiteFile
+from .synthetic_stream import stream_from_spec
+
 
 @dataclass
 class CacheEntry:
     value: Any
     expires_at: float
+    size: int = 0
+    # Past expires_at but before stale_until, the value may still be served
+    # as stale (see TTLCache.get_entry) while a refresh runs.
+    stale_until: float = 0.0
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate footprint of a cached value (its compact JSON length)."""
+    try:
+        return len(json.dumps(_encode(value), ensure_ascii=False, separators=(",", ":"), default=str))
+    except Exception:
+        return 0
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, StreamPaperSet):
+        # A stream is stored as the spec that regenerates it, never as questions.
+        return {"__paper_stream__": value.key, "spec": value.stream.spec()}
+    if isinstance(value, PaperSet):
+        return {"__paper_set__": value.key, "papers": value.to_papers()}
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(_encode(value), ensure_ascii=False, separators=(",", ":"))
+
+
+def _int_keys(value: dict) -> dict:
+    # JSON turns the int year keys of a paper set into strings; restore them.
+    return {(int(k) if k.lstrip("-").isdigit() else k): v for k, v in value.items()}
+
+
+def _loads(raw: str) -> Any:
+    value = json.loads(raw)
+    if isinstance(value, dict):
+        if "__paper_set__" in value:
+            return intern_papers(value["__paper_set__"], _int_keys(value["papers"]))
+        if "__paper_stream__" in value:
+            return intern_papers(value["__paper_stream__"], stream_from_spec(value["spec"]))
+        return _int_keys(value)
+    return value
+
+
+class DiskCache:
+    """SQLite-backed persistence for cache entries, so a fresh process starts warm.
+
+    Each row keeps the JSON payload, its SHA-256 and the absolute expiry
+    time. Any SQLite error disables the disk layer for the rest of the
+    process instead of failing the request.
+    """
+
+    def __init__(self, path: str):
+        self._db = SQLiteFile(path, self._create_tables)
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, sha256 TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, stored_at REAL NOT NULL, stale_until REAL)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+        if "stale_until" not in columns:
+            conn.execute("ALTER TABLE entries ADD COLUMN stale_until REAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str, now: float) -> Optional[Tuple[Any, float, float]]:
+        """Return (value, expires_at, stale_until) while the row is fresh or still servable stale."""
+        def op(conn: sqlite3.Connection):
+            row = conn.execute(
+                "SELECT payload, sha256, expires_at, COALESCE(stale_until, expires_at) FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if not row:
+                return None
+            payload, digest, expires_at, stale_until = row
+            if stale_until < now or hashlib.sha256(payload.encode("utf-8")).hexdigest() != digest:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            return _loads(payload), expires_at, stale_until
+
+        return self._db.run(op)
+
+    def set(self, key: str, value: Any, expires_at: float, stale_until: Optional[float] = None) -> None:
+        try:
+            payload = _dumps(value)
+        except (TypeError, ValueError):
+            return
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+        def op(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, payload, sha256, expires_at, stored_at, stale_until)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, payload, digest, expires_at, time.time(), stale_until if stale_until is not None else expires_at),
+            )
+            conn.commit()
+
+        self._db.run(op)
+
+    def purge_expired(self, now: float) -> None:
+        def op(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM entries WHERE COALESCE(stale_until, expires_at) < ?", (now,))
+            conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+            conn.commit()
+
+        self._db.run(op)
+
+    def try_lease(self, name: str, owner: str, ttl_seconds: float) -> Optional[bool]:
+        """Take or renew lease ``name`` for ``owner`` unless another owner holds it unexpired.
+
+        Returns None when the disk layer is unavailable (nothing to coordinate through).
+        """
+        now = time.time()
+
+        def op(conn: sqlite3.Connection):
+            cur = conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+                (name, owner, now + ttl_seconds, now),
+            )
+            conn.commit()
+            return cur.rowcount == 1
+
+        return self._db.run(op)
+
+    def release_lease(self, name: str, owner: str) -> None:
+        def op(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+            conn.commit()
+
+        self._db.run(op)
+
+    def put_job(self, job_id: str, status: Dict[str, Any], expires_at: float) -> None:
+        payload = json.dumps(status, ensure_ascii=False, separators=(",", ":"))
+
+        def op(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, expires_at) VALUES (?, ?, ?)",
+                (job_id, payload, expires_at),
+            )
+            conn.commit()
+
+        self._db.run(op)
+
+    def get_job(self, job_id: str, now: float) -> Optional[Dict[str, Any]]:
+        def op(conn: sqlite3.Connection):
+            row = conn.execute("SELECT status, expires_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if not row or row[1] < now:
+                return None
+            return json.loads(row[0])
+
+        return self._db.run(op)
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        def op(conn: sqlite3.Connection):
+            if prefix is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            conn.commit()
+
+        self._db.run(op)
 
 
 class TTLCache:
-    def __init__(self):
-        self._store: Dict[str, CacheEntry] = {}
+    """Thread-safe TTL cache bounded by entry count and approximate bytes.
+
+    Least recently used entries are evicted first once either bound is hit.
+    Expired entries are dropped when read and by a periodic sweep running on
+    a daemon thread (started on the first ``set``). With a ``disk`` layer,
+    writes go through to it and memory misses are served from it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 300.0,
+        disk: Optional[DiskCache] = None,
+    ):
+        self._disk = disk
+        self._store: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._max_entries = max(1, int(max_entries))
+        self._max_bytes = max(1, int(max_bytes))
+        self._sweep_interval = float(sweep_interval)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._disk_hits = 0
+        self._stale_hits = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
 
     def _now(self) -> float:
         return time.time()
 
+    def _remove(self, key: str) -> None:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
     def get(self, key: str) -> Optional[Any]:
-        entry = self._store.get(key)
-        if not entry:
-            return None
-        if entry.expires_at < self._now():
-            # expired
-            self._store.pop(key, None)
-            return None
-        return entry.value
+        value, stale = self.get_entry(key)
+        return None if stale else value
 
-    def set(self, key: str, value: Any, ttl_seconds: int = 3600) -> None:
-        self._store[key] = CacheEntry(value=value, expires_at=self._now() + ttl_seconds)
+    def get_entry(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Return (value, is_stale). Stale values are only returned within their stale window."""
+        now = self._now()
+        with self._lock:
+            entry = self._store.get(key)
+            if entry and max(entry.stale_until, entry.expires_at) < now:
+                # expired past any stale window
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+            if entry:
+                self._store.move_to_end(key)
+                if entry.expires_at < now:
+                    self._stale_hits += 1
+                    return entry.value, True
+                self._hits += 1
+                return entry.value, False
+        if self._disk is not None:
+            found = self._disk.get(key, now)
+            if found is not None:
+                value, expires_at, stale_until = found
+                with self._lock:
+                    self._put(key, value, expires_at, stale_until)
+                    self._disk_hits += 1
+                    if expires_at < now:
+                        self._stale_hits += 1
+                        return value, True
+                    self._hits += 1
+                return value, False
+        with self._lock:
+            self._misses += 1
+        return None, False
 
-    def clear(self, prefix: Optional[str] = None) -> None:
-        if prefix is None:
-            self._store.clear()
+    def _put(self, key: str, value: Any, expires_at: float, stale_until: float = 0.0) -> None:
+        size = _estimate_size(value)
+        self._remove(key)
+        if size > self._max_bytes:
+            # Would evict everything else and still not fit.
+            self._evictions += 1
+            return
+        self._store[key] = CacheEntry(value=value, expires_at=expires_at, size=size, stale_until=stale_until)
+        self._bytes += size
+        while len(self._store) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._store))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def set(self, key: str, value: Any, ttl_seconds: int = 3600, stale_seconds: int = 0) -> None:
+        expires_at = self._now() + ttl_seconds
+        stale_until = expires_at + max(0, stale_seconds)
+        with self._lock:
+            self._put(key, value, expires_at, stale_until)
+        if self._disk is not None:
+            self._disk.set(key, value, expires_at, stale_until)
+        self._ensure_sweeper()
+
+    def sweep(self) -> int:
+        """Drop every entry past its expiry and stale window; returns how many were removed."""
+        now = self._now()
+        with self._lock:
+            expired = [k for k, e in self._store.items() if max(e.stale_until, e.expires_at) < now]
+            for k in expired:
+                self._remove(k)
+            self._expirations += len(expired)
+        if self._disk is not None:
+            self._disk.purge_expired(now)
+        return len(expired)
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None or self._sweep_interval <= 0:
             return
-        for k in list(self._store.keys()):
-            if k.startswith(prefix):
-                self._store.pop(k, None)
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="paper-cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self._sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                pass
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "stale_hits": self._stale_hits,
+                "disk_hits": self._disk_hits,
+                "disk_enabled": self._disk is not None,
+            }
+
+    def try_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Cross-process lease through the disk layer; always granted without one."""
+        if self._disk is None:
+            return True
+        granted = self._disk.try_lease(name, owner, ttl_seconds)
+        return True if granted is None else granted
+
+    def release_lease(self, name: str, owner: str) -> None:
+        if self._disk is not None:
+            self._disk.release_lease(name, owner)
+
+    def put_job(self, job_id: str, status: Dict[str, Any], ttl_seconds: float) -> None:
+        """Publish a background job's status to every process sharing the disk layer."""
+        if self._disk is not None:
+            self._disk.put_job(job_id, status, self._now() + ttl_seconds)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job status published by any process, or None (always None without a disk layer)."""
+        if self._disk is None:
+            return None
+        return self._disk.get_job(job_id, self._now())
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        with self._lock:
+            if prefix is None:
+                self._store.clear()
+                self._bytes = 0
+            else:
+                for k in list(self._store.keys()):
+                    if k.startswith(prefix):
+                        self._remove(k)
+        if self._disk is not None:
+            self._disk.clear(prefix)
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    ``do`` blocks followers until the leader finishes and hands them its
+    result (or exception); ``do_async`` starts the call on a daemon thread
+    unless one is already running for that key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "_Call"] = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def do_async(self, key: str, fn: Callable[[], Any]) -> bool:
+        """Run ``fn`` in the background; returns False if a call for ``key`` is already running."""
+        if self.in_flight(key):
+            return False
+
+        def run() -> None:
+            try:
+                self.do(key, fn)
+            except Exception:
+                pass
+
+        threading.Thread(target=run, name=f"refresh:{key}", daemon=True).start()
+        return True
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
 
 
-# Global cache instance for convenience
-cache = TTLCache()
+# Global cache instance for convenience. Set EXAM_PAPER_CACHE_PATH to an empty
+# string to keep the cache in memory only.
+_DISK_PATH = os.environ.get(
+    "EXAM_PAPER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "paper_cache.sqlite3"),
+)
+cache = TTLCache(
+    max_entries=int(os.environ.get("EXAM_PAPER_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("EXAM_PAPER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    sweep_interval=float(os.environ.get("EXAM_PAPER_CACHE_SWEEP_SECONDS", "300")),
+    disk=DiskCache(_DISK_PATH) if _DISK_PATH else None,
+)
+flights = SingleFlight()
 
 
 def cache_key(subject: str, term: str) -> str:
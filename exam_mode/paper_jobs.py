@@ -0,0 +1,183 @@
+from __future__ import annotations
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .paper_set import PaperSet
+
+FETCH_JOB_WORKERS = int(os.environ.get("EXAM_FETCH_JOB_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.environ.get("EXAM_FETCH_JOB_MAX_PENDING", "32"))
+FINISHED_JOB_TTL_SECONDS = 15 * 60
+MAX_FINISHED_JOBS = 256
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class PaperJob:
+    """A background paper fetch for one subject/term, shared by every session waiting on it."""
+
+    __slots__ = (
+        "job_id", "key", "subject", "term", "status", "error", "papers",
+        "created_at", "started_at", "finished_at", "_callbacks",
+    )
+
+    def __init__(self, key: str, subject: str, term: str):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.subject = subject
+        self.term = term
+        self.status = "queued"  # queued -> running -> done | failed
+        self.error: Optional[str] = None
+        self.papers: Optional[PaperSet] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._callbacks: List[Callable[[PaperSet], None]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts = self.papers.year_counts() if self.papers is not None else {}
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "subject": self.subject,
+            "term": self.term,
+            "papers": counts,
+            "total_questions": sum(counts.values()),
+            "unbounded": self.papers is not None and self.papers.unbounded,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class PaperJobQueue:
+    """Runs paper fetches on a small bounded pool, one job per subject/term at a time.
+
+    ``submit`` returns the queued or running job for the same key if there
+    is one, so client retries never start a second crawl. ``on_done``
+    callbacks run on the worker thread once the papers are loaded.
+
+    Jobs run in the process that created them. With a ``status_store``
+    (the paper cache, when it has a disk layer) every status change is
+    also published there, so ``status`` answers for jobs started by any
+    worker sharing it.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str], PaperSet],
+        key_fn: Callable[[str, str], str],
+        max_workers: int = FETCH_JOB_WORKERS,
+        max_pending: int = MAX_PENDING_JOBS,
+        status_store: Optional[Any] = None,
+    ):
+        self._loader = loader
+        self._status_store = status_store
+        self._key_fn = key_fn
+        self._max_workers = max(1, int(max_workers))
+        self._max_pending = max(1, int(max_pending))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active: Dict[str, PaperJob] = {}
+        self._jobs: "OrderedDict[str, PaperJob]" = OrderedDict()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="paper-job")
+        return self._pool
+
+    def _publish(self, job: PaperJob) -> None:
+        if self._status_store is not None:
+            try:
+                self._status_store.put_job(job.job_id, job.to_dict(), FINISHED_JOB_TTL_SECONDS)
+            except Exception:
+                pass
+
+    def _prune(self, now: float) -> None:
+        for job_id, job in list(self._jobs.items()):
+            expired = job.finished and now - (job.finished_at or now) > FINISHED_JOB_TTL_SECONDS
+            if expired or (job.finished and len(self._jobs) > MAX_FINISHED_JOBS + len(self._active)):
+                del self._jobs[job_id]
+
+    def submit(self, subject: str, term: str, on_done: Optional[Callable[[PaperSet], None]] = None) -> PaperJob:
+        key = self._key_fn(subject, term)
+        with self._lock:
+            self._prune(time.time())
+            job = self._active.get(key)
+            created = job is None
+            if created:
+                if len(self._active) >= self._max_pending:
+                    raise JobQueueFull("Too many paper fetches in progress; try again shortly")
+                job = PaperJob(key, subject, term)
+                self._active[key] = job
+                self._jobs[job.job_id] = job
+            if on_done is not None:
+                job._callbacks.append(on_done)
+        if created:
+            self._publish(job)
+            self._executor().submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[PaperJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job started here, or published by another worker."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self._status_store is None:
+            return None
+        try:
+            return self._status_store.get_job(job_id)
+        except Exception:
+            return None
+
+    def _run(self, job: PaperJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._publish(job)
+        try:
+            papers = self._loader(job.subject, job.term)
+        except Exception as e:
+            with self._lock:
+                job.error = str(e) or type(e).__name__
+                job.status = "failed"
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+            self._publish(job)
+            return
+        with self._lock:
+            # No new callbacks can attach once the job leaves _active.
+            self._active.pop(job.key, None)
+            callbacks = list(job._callbacks)
+            job._callbacks.clear()
+        for cb in callbacks:
+            try:
+                cb(papers)
+            except Exception:
+                pass
+        job.papers = papers
+        job.finished_at = time.time()
+        job.status = "done"
+        self._publish(job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self._max_workers,
+                "active": len(self._active),
+                "tracked": len(self._jobs),
+            }
@@ -1,27 +1,148 @@
 from __future__ import annotations
+import hashlib
 import io
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Optional
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from .crawl_state import CrawlRecord, crawl_state
+from .question_dedupe import merge_near_duplicates
 
 BASE_URL = "https://pastpapers.wiki"
 GRADE9_START_URL = "https://pastpapers.wiki/grade-09-term-test-papers-past-papers-short-notes-2/"
 
+USER_AGENT = "TutorAI-ExamMode/1.0 (+https://example.com)"
+MAX_TERM_PAGES = 12
+MAX_PDFS_PER_PAGE = 3
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+# Politeness: minimum gap between request starts to the same host.
+HOST_MIN_INTERVAL_SECONDS = float(os.environ.get("EXAM_CRAWL_MIN_INTERVAL", "0.25"))
+SCRAPE_DEADLINE_SECONDS = 45.0
+# PDF text extraction is CPU-bound pure Python; it runs in a small process
+# pool with per-document page and time budgets.
+PDF_WORKERS = int(os.environ.get("EXAM_PDF_WORKERS", str(min(2, os.cpu_count() or 1))))
+PDF_MAX_PAGES = 25
+PDF_TIME_BUDGET_SECONDS = 20.0
+
 
 class ScrapeError(Exception):
     pass
 
 
-def _get(url: str) -> BeautifulSoup:
-    headers = {
-        "User-Agent": "TutorAI-ExamMode/1.0 (+https://example.com)"
-    }
-    r = requests.get(url, headers=headers, timeout=20)
+class _YieldedToLive(ScrapeError):
+    pass
+
+
+class PartialPapers(dict):
+    """Papers from a scrape that ran out of time with pages or PDFs still pending."""
+
+
+_session_lock = threading.Lock()
+_shared_session: Optional[requests.Session] = None
+# Live (request-driven) scrapes in flight. Background scrapes (the cache
+# warmer) extract PDFs one at a time and only while this is zero.
+_live_lock = threading.Condition()
+_live_scrapes = 0
+_background_pdf_slot = threading.Semaphore(1)
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_next_start: Dict[str, float] = {}
+
+
+def _http_session() -> requests.Session:
+    """Process-wide pooled session (keep-alive connections are reused across scrapes)."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            sess.headers["User-Agent"] = USER_AGENT
+            _shared_session = sess
+        return _shared_session
+
+
+@contextmanager
+def _host_slot(url: str) -> Iterator[None]:
+    """Cap concurrent requests per host at MAX_PER_HOST, started at most every HOST_MIN_INTERVAL_SECONDS."""
+    host = urlparse(url).netloc
+    with _session_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+    with slot:
+        with _session_lock:
+            now = time.monotonic()
+            start = max(now, _host_next_start.get(host, 0.0))
+            _host_next_start[host] = start + HOST_MIN_INTERVAL_SECONDS
+        if start > now:
+            time.sleep(start - now)
+        yield
+
+
+def _fetch(
+    url: str,
+    timeout: float,
+    session: Optional[requests.Session] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """GET ``url``; with ``validators`` the request is conditional and may return a 304."""
+    sess = session or _http_session()
+    with _host_slot(url):
+        r = sess.get(url, timeout=timeout, headers=validators or None)
+    if r.status_code == 304 and validators:
+        crawl_state.count("not_modified")
+        return r
     if r.status_code != 200:
         raise ScrapeError(f"HTTP {r.status_code} for {url}")
-    return BeautifulSoup(r.text, "lxml")
+    crawl_state.count("fetched")
+    return r
+
+
+def _crawl_record(url: str, r: requests.Response, **fields) -> CrawlRecord:
+    return CrawlRecord(url=url, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"), **fields)
+
+
+def _get(url: str, timeout: float = 20, session: Optional[requests.Session] = None) -> BeautifulSoup:
+    """Fetch and parse an HTML page, revalidating a stored copy with a conditional GET."""
+    rec = crawl_state.get(url)
+    cached = rec.body if rec is not None else None
+    r = _fetch(url, timeout, session, rec.validators() if cached is not None else None)
+    if r.status_code == 304:
+        return BeautifulSoup(cached, "lxml")
+    html = r.text
+    if r.headers.get("ETag") or r.headers.get("Last-Modified"):
+        crawl_state.put(_crawl_record(url, r, body=html))
+    return BeautifulSoup(html, "lxml")
+
+
+def _absolute(href: str, page_url: str) -> Optional[str]:
+    """``href`` resolved against the page it appears on, without its fragment.
+
+    None for links that lead nowhere new: fragment-only ("#comments"),
+    non-HTTP schemes (mailto:, javascript:, tel:, ...) and the page itself.
+    """
+    href = (href or "").strip()
+    if not href or href.startswith("#"):
+        return None
+    url = urldefrag(urljoin(page_url, href))[0]
+    if urlparse(url).scheme not in ("http", "https") or url == urldefrag(page_url)[0]:
+        return None
+    return url
 
 
 def _normalize_term(term: str) -> str:
@@ -32,26 +153,29 @@ def _normalize_term(term: str) -> str:
     return term
 
 
-def _find_grade9_subject_page(subject: str) -> Optional[str]:
+def _find_grade9_subject_page(
+    subject: str,
+    start_url: str = GRADE9_START_URL,
+    base_url: str = BASE_URL,
+    timeout: float = 20,
+    session: Optional[requests.Session] = None,
+) -> Optional[str]:
     # Strategy: start from the known Grade 9 term-test page and find a subject link.
     # This is heuristic and may need selector tweaks if the site structure changes.
-    g9 = _get(GRADE9_START_URL)
+    g9 = _get(start_url, timeout=timeout, session=session)
     subject_key = (subject or '').strip().lower()
-    subj_link = None
+    if not subject_key:
+        return None
     for a in g9.select('a[href]'):
         text = (a.get_text() or '').strip().lower()
-        href = a['href']
-        if subject_key and subject_key in text:
-            subj_link = href
-            break
-    if not subj_link:
-        return None
-    if subj_link.startswith('/'):
-        subj_link = BASE_URL + subj_link
-    return subj_link
+        if subject_key in text:
+            url = _absolute(a['href'], start_url)
+            if url:
+                return url
+    return None
 
 
-def _filter_term_links(soup: BeautifulSoup, term: str) -> List[str]:
+def _filter_term_links(soup: BeautifulSoup, term: str, base_url: str = BASE_URL, page_url: Optional[str] = None) -> List[str]:
     term_norm = _normalize_term(term)
     links = []
     for a in soup.select('a[href]'):
@@ -65,10 +189,9 @@ def _filter_term_links(soup: BeautifulSoup, term: str) -> List[str]:
     # Normalize
     clean = []
     for href in links:
-        if href.startswith('/'):
-            href = BASE_URL + href
-        if href.startswith(BASE_URL):
-            clean.append(href)
+        url = _absolute(href, page_url or base_url + "/")
+        if url and url.startswith(base_url):
+            clean.append(url)
     return list(dict.fromkeys(clean))  # dedupe, preserve order
 
 
@@ -109,17 +232,15 @@ def _parse_question_blocks(soup: BeautifulSoup) -> List[str]:
     return result
 
 
-def _extract_pdf_links(soup: BeautifulSoup) -> List[str]:
+def _extract_pdf_links(soup: BeautifulSoup, page_url: str = BASE_URL + "/") -> List[str]:
     links: List[str] = []
     for a in soup.select('a[href]'):
         href = (a.get('href') or '').strip()
         if not href:
             continue
-        hlow = href.lower()
-        if '.pdf' in hlow:
-            if href.startswith('/'):
-                href = BASE_URL + href
-            links.append(href)
+        url = _absolute(href, page_url) if '.pdf' in href.lower() else None
+        if url:
+            links.append(url)
     # De-duplicate while preserving order
     clean: List[str] = []
     seen = set()
@@ -130,13 +251,11 @@ def _extract_pdf_links(soup: BeautifulSoup) -> List[str]:
     return clean
 
 
-def _download_pdf_bytes(url: str) -> bytes:
-    headers = {
-        "User-Agent": "TutorAI-ExamMode/1.0 (+https://example.com)"
-    }
-    r = requests.get(url, headers=headers, timeout=35)
-    if r.status_code != 200:
-        raise ScrapeError(f"HTTP {r.status_code} for {url}")
+def _download_pdf_bytes(url: str, timeout: float = 35, session: Optional[requests.Session] = None) -> bytes:
+    return _pdf_body(url, _fetch(url, timeout, session))
+
+
+def _pdf_body(url: str, r: requests.Response) -> bytes:
     ctype = (r.headers.get('Content-Type') or '').lower()
     if 'pdf' not in ctype and not url.lower().endswith('.pdf'):
         # Some servers don't set content-type correctly, so we only hard-fail
@@ -145,112 +264,411 @@ def _download_pdf_bytes(url: str) -> bytes:
     return r.content
 
 
-def _extract_text_from_pdf(pdf_bytes: bytes) -> str:
+class _PdfBudgetExceeded(Exception):
+    pass
+
+
+def _iter_pdf_pages(pdf_bytes: bytes, max_pages: int = PDF_MAX_PAGES, time_budget: Optional[float] = None) -> Iterator[str]:
+    """Yield the text of each page up to ``max_pages``.
+
+    Raises _PdfBudgetExceeded once ``time_budget`` seconds are spent with pages left.
+    """
     try:
         from pypdf import PdfReader  # type: ignore
     except Exception as e:
         raise ScrapeError("pypdf is not available; install requirements") from e
 
+    started = time.monotonic()
     try:
         reader = PdfReader(io.BytesIO(pdf_bytes))  # type: ignore[name-defined]
     except Exception as e:
         raise ScrapeError("Failed to open PDF") from e
 
-    chunks: List[str] = []
-    for p in reader.pages[:25]:
+    for p in reader.pages[:max_pages]:
+        if time_budget is not None and time.monotonic() - started > time_budget:
+            raise _PdfBudgetExceeded()
         try:
             t = p.extract_text() or ''
         except Exception:
             t = ''
         if t:
-            chunks.append(t)
-    return "\n".join(chunks)
+            yield t
 
 
-def _parse_questions_from_text(text: str) -> List[str]:
-    # Normalize whitespace but keep line breaks for better parsing.
-    raw_lines = [ln.strip() for ln in (text or '').splitlines()]
-    raw_lines = [ln for ln in raw_lines if ln]
-    joined = "\n".join(raw_lines)
-
-    # Split at common question markers.
-    # Examples: "1.", "1)", "Q1", "Question 1"
-    pattern = re.compile(
-        r"(?:^|\n)\s*(?:Q\s*\d+|Question\s*\d+|\d{1,2}\s*[\).]|\d{1,2}\s*\.)\s+",
-        flags=re.IGNORECASE,
-    )
-
-    parts = pattern.split(joined)
-    # The split removes markers; the first chunk is usually preamble.
-    candidates = [p.strip() for p in parts[1:] if p and p.strip()]
+def _extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    return "\n".join(_iter_pdf_pages(pdf_bytes))
 
-    questions: List[str] = []
-    for c in candidates:
+
+# Split at common question markers.
+# Examples: "1.", "1)", "Q1", "Question 1"
+_QUESTION_MARKER = re.compile(
+    r"(?:^|\n)\s*(?:Q\s*\d+|Question\s*\d+|\d{1,2}\s*[\).]|\d{1,2}\s*\.)\s+",
+    flags=re.IGNORECASE,
+)
+
+
+def _iter_questions(chunks: Iterable[str]) -> Iterator[str]:
+    """Incrementally split text chunks (e.g. PDF pages) into questions.
+
+    A question is emitted as soon as the next marker is seen, so parsing
+    overlaps with extraction. Text before the first marker is preamble.
+    """
+    buffer = ''
+    seen = set()
+
+    def emit(segment: str) -> Optional[str]:
         # Stop at very long chunks; keep it question-like.
-        c = re.sub(r"\s+", " ", c).strip()
+        c = re.sub(r"\s+", " ", segment).strip()
         if len(c) < 20:
-            continue
+            return None
         if len(c) > 900:
             c = c[:900].rsplit(' ', 1)[0] + '…'
-        questions.append(c)
+        if c in seen:
+            return None
+        seen.add(c)
+        return c
+
+    for chunk in chunks:
+        # Normalize whitespace but keep line breaks for better parsing.
+        lines = [ln.strip() for ln in (chunk or '').splitlines()]
+        text = "\n".join(ln for ln in lines if ln)
+        if not text:
+            continue
+        buffer = buffer + "\n" + text if buffer else text
+        matches = list(_QUESTION_MARKER.finditer(buffer))
+        if not matches:
+            # Still in the preamble; only the last line can turn into a marker.
+            buffer = buffer[buffer.rfind("\n") + 1:]
+            continue
+        for cur, nxt in zip(matches, matches[1:]):
+            q = emit(buffer[cur.end():nxt.start()])
+            if q:
+                yield q
+        # The last question may continue on the next chunk.
+        buffer = buffer[matches[-1].start():]
+
+    matches = list(_QUESTION_MARKER.finditer(buffer))
+    for i, cur in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(buffer)
+        q = emit(buffer[cur.end():end])
+        if q:
+            yield q
 
-    # De-dup preserve order
-    seen = set()
-    out: List[str] = []
-    for q in questions:
-        if q not in seen:
-            seen.add(q)
-            out.append(q)
-    return out
 
+def _parse_questions_from_text(text: str) -> List[str]:
+    return list(_iter_questions([text]))
 
-def scrape_papers_dynamic(subject: str, term: str) -> Dict[int, List[dict]]:
+
+def _on_pdf_alarm(signum, frame):
+    raise _PdfBudgetExceeded()
+
+
+def _pdf_questions_worker(
+    pdf_bytes: bytes, max_pages: int, time_budget: float, hard_deadline: bool = False
+) -> Tuple[List[str], bool]:
+    """Runs in the PDF process pool: pages stream straight into the question parser.
+
+    With ``hard_deadline`` (pool workers only; signals need the main thread)
+    a SIGALRM fires ``time_budget`` seconds after the job starts, so even a
+    single pathological page cannot hold the worker. Returns the questions
+    parsed so far and whether the PDF was read to the end (False if the
+    budget cut it short).
+    """
+    questions: List[str] = []
+    complete = True
+
+    def pages() -> Iterator[str]:
+        nonlocal complete
+        try:
+            yield from _iter_pdf_pages(pdf_bytes, max_pages=max_pages, time_budget=time_budget)
+        except _PdfBudgetExceeded:
+            complete = False  # still parse the question in progress
+
+    armed = hard_deadline and hasattr(signal, "setitimer")
+    if armed:
+        previous = signal.signal(signal.SIGALRM, _on_pdf_alarm)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+    try:
+        for q in _iter_questions(pages()):
+            questions.append(q)
+    except _PdfBudgetExceeded:
+        complete = False
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return questions, complete
+
+
+_pdf_pool_lock = threading.Lock()
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_disabled = False
+
+
+def _pdf_mp_context():
+    # Never fork: the parent is a threaded server (session sweeper, scrape
+    # and SQLite threads), and a forked child can inherit a held lock.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_pdf_pool() -> Optional[ProcessPoolExecutor]:
+    global _pdf_pool, _pdf_pool_disabled
+    with _pdf_pool_lock:
+        if _pdf_pool is None and not _pdf_pool_disabled and PDF_WORKERS > 0:
+            try:
+                _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=_pdf_mp_context())
+            except (OSError, NotImplementedError, ValueError):
+                # e.g. serverless sandboxes without multiprocessing support
+                _pdf_pool_disabled = True
+        return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool with a stuck worker; the next extraction starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+
+
+def _await_pdf_job(fut: Future, time_budget: float) -> Tuple[List[str], bool]:
+    """Result of a pooled extraction, timing only the time it spends running.
+
+    The worker enforces ``time_budget`` itself; this is a safety net for a
+    worker stuck where the alarm cannot reach it. A job can be reported as
+    running while it still sits in the executor's call queue behind one
+    other job, hence the doubled budget.
+    """
+    started: Optional[float] = None
+    while True:
+        try:
+            return fut.result(timeout=0.5)
+        except FutureTimeout:
+            if started is None:
+                if fut.running():
+                    started = time.monotonic()
+            elif time.monotonic() - started > 2 * time_budget + 10:
+                raise
+
+
+def extract_pdf_questions(
+    pdf_bytes: bytes, max_pages: int = PDF_MAX_PAGES, time_budget: float = PDF_TIME_BUDGET_SECONDS
+) -> Tuple[List[str], bool]:
+    """Extract and parse a PDF off the calling thread's GIL, in a bounded process pool.
+
+    Returns (questions, whether the PDF was read to the end); see
+    _pdf_questions_worker. Time waiting for a free worker does not count
+    against ``time_budget``.
+    Falls back to running inline if no process pool can be used here.
+    """
+    global _pdf_pool, _pdf_pool_disabled
+    pool = _get_pdf_pool()
+    if pool is not None:
+        try:
+            fut = pool.submit(_pdf_questions_worker, pdf_bytes, max_pages, time_budget, True)
+            return _await_pdf_job(fut, time_budget)
+        except FutureTimeout as e:
+            _discard_pdf_pool(pool)
+            raise ScrapeError("PDF extraction exceeded its time budget") from e
+        except BrokenProcessPool:
+            with _pdf_pool_lock:
+                # A pool we discarded ourselves is not a reason to stop pooling.
+                if _pdf_pool is pool:
+                    _pdf_pool = None
+                    _pdf_pool_disabled = True
+        except RuntimeError:
+            # Pool shut down (interpreter exit); fall through to inline.
+            pass
+    return _pdf_questions_worker(pdf_bytes, max_pages, time_budget)
+
+
+def live_scrapes() -> int:
+    with _live_lock:
+        return _live_scrapes
+
+
+@contextmanager
+def _live_scrape() -> Iterator[None]:
+    global _live_scrapes
+    with _live_lock:
+        _live_scrapes += 1
+    try:
+        yield
+    finally:
+        with _live_lock:
+            _live_scrapes -= 1
+            _live_lock.notify_all()
+
+
+def _extract_in_background(pdf_bytes: bytes, deadline: float) -> Tuple[List[str], bool]:
+    """Extract for a background scrape: one PDF at a time, and only once no live scrape is running."""
+    with _background_pdf_slot:
+        with _live_lock:
+            if not _live_lock.wait_for(lambda: _live_scrapes == 0, timeout=max(0.0, deadline - time.monotonic())):
+                raise _YieldedToLive("PDF skipped: live scrapes kept the extraction pool busy")
+        return extract_pdf_questions(pdf_bytes)
+
+
+def _pdf_questions(
+    url: str,
+    timeout: float,
+    session: Optional[requests.Session],
+    background_deadline: Optional[float] = None,
+) -> List[str]:
+    """Questions of one PDF. Unchanged PDFs (304, or the same bytes again) are not re-parsed.
+
+    A parse the time budget cut short is returned but not stored, so the
+    PDF is parsed again on the next crawl.
+    """
+    rec = crawl_state.get(url)
+    cached = rec.questions if rec is not None else None
+    r = _fetch(url, timeout, session, rec.validators() if cached is not None else None)
+    if r.status_code == 304:
+        return cached
+    pdf_bytes = _pdf_body(url, r)
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    if cached is not None and rec.sha256 == digest:
+        crawl_state.count("unchanged_pdfs")
+        crawl_state.put(_crawl_record(url, r, sha256=digest, questions=cached))
+        return cached
+    crawl_state.count("parsed_pdfs")
+    if background_deadline is not None:
+        questions, complete = _extract_in_background(pdf_bytes, background_deadline)
+    else:
+        questions, complete = extract_pdf_questions(pdf_bytes)
+    if complete:
+        crawl_state.put(_crawl_record(url, r, sha256=digest, questions=questions))
+    else:
+        crawl_state.count("truncated_pdfs")
+    return questions
+
+
+def _term_page(url: str, timeout: float, session: Optional[requests.Session]) -> Tuple[int, List[str], List[str]]:
+    """Fetch one term page: (year, pdf links, HTML question blocks as fallback)."""
+    page = _get(url, timeout=timeout, session=session)
+    title_text = page.title.get_text() if page.title else ''
+    year = _extract_year_from_title(title_text) or _extract_year_from_title(url) or 0
+    return year, _extract_pdf_links(page, url)[:MAX_PDFS_PER_PAGE], _parse_question_blocks(page)
+
+
+def scrape_papers_dynamic(
+    subject: str,
+    term: str,
+    *,
+    base_url: str = BASE_URL,
+    start_url: str = GRADE9_START_URL,
+    deadline_seconds: float = SCRAPE_DEADLINE_SECONDS,
+    session: Optional[requests.Session] = None,
+    background: bool = False,
+) -> Dict[int, List[dict]]:
     """
     Scrape pastpapers.wiki for Grade 9 -> subject -> term.
     Returns: { year: [ {id, year, subject, term, text, type, choices, answer}, ...] }
+
+    Term pages and their PDFs are fetched concurrently over a pooled session
+    (at most MAX_PER_HOST requests per host). When ``deadline_seconds`` runs
+    out, whatever has been parsed so far is returned as PartialPapers. ``base_url`` and
+    ``start_url`` can point at a local stub server for testing.
+
+    A ``background`` scrape (cache warming) yields the PDF pool to live
+    scrapes. If that, or the deadline, left it incomplete, it raises
+    ScrapeError rather than return a partial set.
     """
-    subj_page = _find_grade9_subject_page(subject)
+    if background:
+        return _scrape(subject, term, base_url, start_url, deadline_seconds, session, background)
+    with _live_scrape():
+        return _scrape(subject, term, base_url, start_url, deadline_seconds, session, background)
+
+
+def _scrape(
+    subject: str,
+    term: str,
+    base_url: str,
+    start_url: str,
+    deadline_seconds: float,
+    session: Optional[requests.Session],
+    background: bool,
+) -> Dict[int, List[dict]]:
+    deadline = time.monotonic() + deadline_seconds
+
+    def remaining(cap: float) -> float:
+        return max(0.5, min(cap, deadline - time.monotonic()))
+
+    subj_page = _find_grade9_subject_page(subject, start_url, base_url, timeout=remaining(20), session=session)
     if not subj_page:
         raise ScrapeError("Could not locate Grade 9 subject page")
 
-    soup = _get(subj_page)
-    term_links = _filter_term_links(soup, term)
+    soup = _get(subj_page, timeout=remaining(20), session=session)
+    term_links = _filter_term_links(soup, term, base_url, subj_page)[:MAX_TERM_PAGES]  # limit traversal depth
+
+    # Per term link: year, HTML fallback blocks, and PDF results by position.
+    years: Dict[int, int] = {}
+    fallback: Dict[int, List[str]] = {}
+    pdf_results: Dict[int, Dict[int, List[str]]] = {}
+    pending: Dict[Future, Tuple[str, int, int]] = {}
+    yielded = False
+
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="paper-scrape")
+    try:
+        for i, link in enumerate(term_links):
+            pending[pool.submit(_term_page, link, remaining(20), session)] = ("page", i, 0)
+
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            done, _ = wait(list(pending), timeout=left, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, i, j = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except _YieldedToLive:
+                    yielded = True
+                    continue
+                except Exception:
+                    continue
+                if kind == "page":
+                    year, pdf_links, blocks = result
+                    years[i] = year
+                    fallback[i] = blocks
+                    pdf_results[i] = {}
+                    # Prefer PDFs (real scanning); a few per page to avoid long delays.
+                    for j, pdf_url in enumerate(pdf_links):
+                        pending[pool.submit(
+                            _pdf_questions, pdf_url, remaining(35), session, deadline if background else None,
+                        )] = ("pdf", i, j)
+                elif result:
+                    pdf_results[i][j] = result
+    finally:
+        # Don't wait for stragglers past the deadline; their results are dropped.
+        pool.shutdown(wait=False, cancel_futures=True)
+    if background and (yielded or pending):
+        raise ScrapeError("Background scrape did not finish; left to live requests")
 
     year_to_questions: Dict[int, List[dict]] = {}
     qid = 1
     subject_norm = subject
     term_norm = _normalize_term(term)
 
-    for link in term_links[:12]:  # limit traversal depth
-        try:
-            page = _get(link)
-        except ScrapeError:
-            continue
-        title_text = page.title.get_text() if page.title else ''
-        year = _extract_year_from_title(title_text) or _extract_year_from_title(link) or 0
-
-        # Prefer PDFs (real scanning). If no PDFs exist, fallback to HTML parsing.
+    for i in sorted(years):
+        year = years[i]
         questions_text: List[str] = []
-        pdf_links = _extract_pdf_links(page)
-        if pdf_links:
-            # Download and parse a few PDFs to avoid long delays.
-            for pdf_url in pdf_links[:3]:
-                try:
-                    pdf_bytes = _download_pdf_bytes(pdf_url)
-                    pdf_text = _extract_text_from_pdf(pdf_bytes)
-                    parsed = _parse_questions_from_text(pdf_text)
-                    if parsed:
-                        questions_text.extend(parsed)
-                except Exception:
-                    continue
-
+        for j in sorted(pdf_results.get(i, {})):
+            questions_text.extend(pdf_results[i][j])
         if not questions_text:
-            questions_text = _parse_question_blocks(page)
+            questions_text = fallback.get(i) or []
         if not questions_text:
             continue
 
         qlist: List[dict] = []
-        for idx, qt in enumerate(questions_text, start=1):
+        for qt in questions_text:
             qlist.append({
                 "id": f"{year or 'u'}-{qid}",
                 "year": int(year) if year else 0,
@@ -274,4 +692,6 @@ def scrape_papers_dynamic(subject: str, term: str) -> Dict[int, List[dict]]:
     if not year_to_questions:
         raise ScrapeError("No questions found for the selected subject/term")
 
-    return year_to_questions
+    # Papers reuse (and lightly reword) questions across years.
+    merged = merge_near_duplicates(year_to_questions)
+    return PartialPapers(merged) if pending else merged
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import hashlib
+import json
+import sys
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .answers import NormalizedAnswer, normalize_answer
+
+
+def _freeze_question(q: Mapping) -> Mapping:
+    return MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in q.items()})
+
+
+def _thaw_question(q: Mapping) -> dict:
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in q.items()}
+
+
+class PaperSet(Mapping):
+    """Immutable paper set: year -> tuple of read-only question mappings.
+
+    Reads like the ``{year: [question, ...]}`` dicts the scraper produces,
+    but questions cannot be mutated, so one instance is safely shared by
+    the cache and every session on the same subject/term. Questions are
+    also addressable by position (``questions[i]``), which is what
+    sessions track; the id and per-type indexes and the normalized gold
+    answers (``gold_answers``) are built once per set.
+    Equality and hashing go by (key, content digest).
+    """
+
+    __slots__ = ("key", "digest", "questions", "gold_answers", "_years", "_by_id", "_by_type", "__weakref__")
+
+    unbounded = False
+
+    def __init__(self, key: str, papers: Mapping):
+        plain: List[Tuple[int, List[dict]]] = [
+            (int(year), [_thaw_question(q) for q in papers[year]]) for year in papers
+        ]
+        self.key = key
+        self.digest = hashlib.sha1(
+            json.dumps(plain, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        ).hexdigest()
+        questions: List[Mapping] = []
+        years: Dict[int, Tuple[int, int]] = {}
+        for year, qs in plain:
+            start = len(questions)
+            questions.extend(_freeze_question(q) for q in qs)
+            years[year] = (start, len(questions))
+        self.questions: Tuple[Mapping, ...] = tuple(questions)
+        self._years = years
+        self._by_id: Dict[str, int] = {}
+        by_type: Dict[str, List[int]] = {}
+        for i, q in enumerate(self.questions):
+            self._by_id.setdefault(str(q.get("id")), i)
+            by_type.setdefault(q.get("type") or "general", []).append(i)
+        self._by_type: Dict[str, Tuple[int, ...]] = {t: tuple(ix) for t, ix in by_type.items()}
+        self.gold_answers: Tuple[Optional[NormalizedAnswer], ...] = tuple(
+            normalize_answer(q["answer"]) if q.get("answer") is not None else None for q in self.questions
+        )
+
+    # Mapping interface (year -> questions)
+    def __getitem__(self, year: int) -> Tuple[Mapping, ...]:
+        start, end = self._years[year]
+        return self.questions[start:end]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._years)
+
+    def __len__(self) -> int:
+        return len(self._years)
+
+    def __hash__(self) -> int:
+        return hash((self.key, self.digest))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PaperSet):
+            return self.key == other.key and self.digest == other.digest
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PaperSet({self.key!r}, questions={len(self.questions)}, digest={self.digest[:8]})"
+
+    @property
+    def question_count(self) -> int:
+        return len(self.questions)
+
+    def year_counts(self) -> Dict[int, int]:
+        return {year: end - start for year, (start, end) in self._years.items()}
+
+    def index_of(self, question_id: str) -> Optional[int]:
+        return self._by_id.get(str(question_id))
+
+    def type_indices(self, qtype: Optional[str]) -> Tuple[int, ...]:
+        return self._by_type.get(qtype or "general", ())
+
+    def question(self, index: int) -> dict:
+        """A mutable copy of one question, e.g. for a response body."""
+        return _thaw_question(self.questions[index])
+
+    def to_papers(self) -> Dict[int, List[dict]]:
+        """Plain ``{year: [question, ...]}`` copy (the JSON codec form)."""
+        return {year: [_thaw_question(q) for q in self[year]] for year in self._years}
+
+
+class QuestionStream(ABC):
+    """An unbounded, deterministic sequence of questions computed on demand.
+
+    Question ``i`` must always be the same dict for the same ``spec()``,
+    so a stream can be re-created from its spec in another process.
+    """
+
+    @abstractmethod
+    def question(self, index: int) -> dict:
+        ...
+
+    @abstractmethod
+    def index_of(self, question_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def nth_of_type(self, qtype: str, n: int) -> Optional[int]:
+        """Index of the n-th (0-based) question of ``qtype``, or None if the stream has none of that type."""
+        ...
+
+    @abstractmethod
+    def spec(self) -> Dict[str, Any]:
+        """JSON-safe parameters that fully determine the stream."""
+        ...
+
+
+class _LazySequence:
+    __slots__ = ("_get",)
+
+    def __init__(self, get):
+        self._get = get
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            raise IndexError("unbounded sequence has no end to index from")
+        return self._get(index)
+
+
+class StreamPaperSet(PaperSet):
+    """PaperSet over a QuestionStream: questions are generated when first asked for.
+
+    Nothing is materialized up front and the set never runs dry;
+    ``question_count`` is effectively infinite and ``unbounded`` is True.
+    Iterating it as a year mapping yields nothing.
+    """
+
+    __slots__ = ("stream",)
+
+    unbounded = True
+
+    def __init__(self, key: str, stream: QuestionStream):
+        self.key = key
+        self.stream = stream
+        self.digest = hashlib.sha1(
+            json.dumps(stream.spec(), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        self._years = {}
+        self._by_id = {}
+        self._by_type = {}
+        frozen = lru_cache(maxsize=2048)(lambda i: _freeze_question(stream.question(i)))
+        self.questions = _LazySequence(frozen)
+        self.gold_answers = _LazySequence(
+            lambda i: normalize_answer(frozen(i)["answer"]) if frozen(i).get("answer") is not None else None
+        )
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return f"StreamPaperSet({self.key!r}, spec={self.stream.spec()!r})"
+
+    @property
+    def question_count(self) -> int:
+        return sys.maxsize
+
+    def year_counts(self) -> Dict[int, int]:
+        return {}
+
+    def index_of(self, question_id: str) -> Optional[int]:
+        return self.stream.index_of(str(question_id))
+
+    def type_indices(self, qtype: Optional[str]) -> Tuple[int, ...]:
+        raise TypeError("an unbounded paper set has no finite type index; use nth_of_type")
+
+    def nth_of_type(self, qtype: Optional[str], n: int) -> Optional[int]:
+        return self.stream.nth_of_type(qtype or "general", n)
+
+    def to_papers(self) -> Dict[int, List[dict]]:
+        return {}
+
+
+_lock = threading.Lock()
+_interned: "weakref.WeakValueDictionary[Tuple[str, str], PaperSet]" = weakref.WeakValueDictionary()
+
+
+def intern_papers(key: str, papers: Union[Mapping, QuestionStream]) -> PaperSet:
+    """Canonical PaperSet for ``papers`` (a year mapping or a QuestionStream) under ``key``.
+
+    Identical content under the same key resolves to one shared instance
+    for as long as anything (cache entry, session) still references it.
+    """
+    if isinstance(papers, QuestionStream):
+        candidate: PaperSet = StreamPaperSet(key, papers)
+    elif isinstance(papers, PaperSet) and papers.key == key:
+        candidate = papers
+    else:
+        candidate = PaperSet(key, papers)
+    with _lock:
+        existing = _interned.get((key, candidate.digest))
+        if existing is not None:
+            return existing
+        _interned[(key, candidate.digest)] = candidate
+        return candidate
+
+
+def find_interned(key: str, digest: str) -> Optional[PaperSet]:
+    with _lock:
+        return _interned.get((key, digest))
@@ -0,0 +1,289 @@
+"""Offline question bank for Exam Mode.
+
+Past papers are ingested ahead of time into a single indexed file so that
+``scrape_papers`` can serve a subject/term without touching the network:
+
+    python -m exam_mode.question_bank ingest papers/ --out exam_mode/question_bank.tqb
+    python -m exam_mode.question_bank show exam_mode/question_bank.tqb
+
+Input files are PDFs or saved HTML pages. Subject and term are taken from
+``--subject``/``--term`` or inferred from the path (e.g. ``papers/Maths/Third term/2019.pdf``);
+the year comes from the file name or page title.
+
+File layout (little-endian):
+    b"TQB1" | u32 header length | header JSON | data
+The header maps "subject|term|year|type" to (offset, length, count) of a JSON
+array of questions inside the data section, plus a "subject|term" -> block
+keys index. Readers mmap the file and only decode the blocks they need.
+"""
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .exam_utils import SUBJECT_TYPE_MAP, normalize_term
+from .paper_set import PaperSet, intern_papers
+
+MAGIC = b"TQB1"
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.tqb")
+SOURCE_SUFFIXES = (".pdf", ".html", ".htm")
+
+
+def _norm(value: str) -> str:
+    return (value or "").strip().lower().replace(" ", "_")
+
+
+def bank_key(subject: str, term: str) -> str:
+    return f"{_norm(subject)}|{_norm(normalize_term(term))}"
+
+
+def block_key(subject: str, term: str, year: int, qtype: str) -> str:
+    return f"{bank_key(subject, term)}|{int(year)}|{_norm(qtype) or 'general'}"
+
+
+# Returned for every subject/term the bank does not hold.
+_EMPTY = PaperSet("bank:", {})
+
+
+class QuestionBank:
+    """Read-only, memory-mapped view of a bank file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not a question bank file")
+        (header_len,) = struct.unpack("<I", self._mm[4:8])
+        header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+        self._data_start = 8 + header_len
+        self._blocks: Dict[str, List[int]] = header.get("blocks") or {}
+        self._by_subject_term: Dict[str, List[str]] = header.get("by_subject_term") or {}
+        self._lock = threading.Lock()
+        self._decoded: Dict[str, PaperSet] = {}
+
+    def _read_block(self, key: str) -> List[dict]:
+        offset, length, _count = self._blocks[key]
+        start = self._data_start + offset
+        return json.loads(self._mm[start:start + length].decode("utf-8"))
+
+    def questions(
+        self,
+        subject: str,
+        term: str,
+        year: Optional[int] = None,
+        qtype: Optional[str] = None,
+    ) -> List[dict]:
+        """Questions for a subject/term, optionally narrowed to one year and/or type."""
+        out: List[dict] = []
+        for key in self._by_subject_term.get(bank_key(subject, term), []):
+            _, _, y, t = key.split("|")
+            if year is not None and int(y) != int(year):
+                continue
+            if qtype is not None and t != (_norm(qtype) or "general"):
+                continue
+            out.extend(self._read_block(key))
+        return out
+
+    def lookup(self, subject: str, term: str) -> PaperSet:
+        """Paper set for a subject/term, as scrape_papers returns it (empty if not in the bank)."""
+        key = bank_key(subject, term)
+        if key not in self._by_subject_term:
+            # Subject/term come from clients: only sets the bank holds are cached.
+            return _EMPTY
+        with self._lock:
+            cached = self._decoded.get(key)
+            if cached is not None:
+                return cached
+        papers: Dict[int, List[dict]] = {}
+        for q in self.questions(subject, term):
+            papers.setdefault(int(q.get("year") or 0), []).append(q)
+        paper_set = intern_papers(f"bank:{key}", papers)
+        with self._lock:
+            self._decoded[key] = paper_set
+        return paper_set
+
+    def summary(self) -> Dict[str, int]:
+        return {key: count for key, (_, _, count) in sorted(self._blocks.items())}
+
+
+def write_bank(path: str, questions: Iterable[dict]) -> Dict[str, int]:
+    """Write questions to a bank file; returns question counts per block key."""
+    blocks: Dict[str, List[dict]] = {}
+    for q in questions:
+        key = block_key(q["subject"], q["term"], q.get("year") or 0, q.get("type") or "general")
+        blocks.setdefault(key, []).append(q)
+
+    data = bytearray()
+    index: Dict[str, List[int]] = {}
+    by_subject_term: Dict[str, List[str]] = {}
+    for key in sorted(blocks):
+        payload = json.dumps(blocks[key], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        index[key] = [len(data), len(payload), len(blocks[key])]
+        data.extend(payload)
+        by_subject_term.setdefault(key.rsplit("|", 2)[0], []).append(key)
+
+    header = json.dumps(
+        {"version": 1, "blocks": index, "by_subject_term": by_subject_term},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(data)
+    os.replace(tmp, path)
+    return {key: len(qs) for key, qs in blocks.items()}
+
+
+def _infer_subject(parts: List[str]) -> Optional[str]:
+    for part in parts:
+        for name in SUBJECT_TYPE_MAP:
+            if name.lower() in part.lower():
+                return name
+    return None
+
+
+def _infer_term(parts: List[str]) -> Optional[str]:
+    for part in parts:
+        p = part.strip().lower().replace("_", " ").replace("-", " ")
+        for prefix in ("first", "second", "third"):
+            if p.startswith(prefix) or f"{prefix} term" in p:
+                return normalize_term(prefix)
+    return None
+
+
+def _source_files(sources: List[str]) -> List[str]:
+    files: List[str] = []
+    for src in sources:
+        if os.path.isfile(src):
+            files.append(src)
+            continue
+        for root, _dirs, names in os.walk(src):
+            for name in sorted(names):
+                if name.lower().endswith(SOURCE_SUFFIXES):
+                    files.append(os.path.join(root, name))
+    return sorted(files)
+
+
+def _extract_questions(path: str) -> Tuple[List[str], str]:
+    """Question texts from one source file, plus the text to look for a year in."""
+    from .paper_scraper import (  # lazy: needs bs4/pypdf, like the live scraper
+        _extract_text_from_pdf,
+        _parse_question_blocks,
+        _parse_questions_from_text,
+    )
+
+    if path.lower().endswith(".pdf"):
+        with open(path, "rb") as f:
+            return _parse_questions_from_text(_extract_text_from_pdf(f.read())), ""
+
+    from bs4 import BeautifulSoup
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        soup = BeautifulSoup(f.read(), "lxml")
+    title = soup.title.get_text() if soup.title else ""
+    return _parse_question_blocks(soup), title
+
+
+def ingest(sources: List[str], subject: Optional[str] = None, term: Optional[str] = None) -> List[dict]:
+    """Parse source files into question dicts (same shape the scraper produces).
+
+    Near-duplicates are merged per subject/term across all sources.
+    """
+    from .paper_scraper import _extract_year_from_title
+    from .question_dedupe import merge_near_duplicates
+
+    questions: List[dict] = []
+    counters: Dict[str, int] = {}
+    for path in _source_files(sources):
+        parts = os.path.normpath(path).split(os.sep)
+        subj = subject or _infer_subject(parts)
+        trm = normalize_term(term) if term else _infer_term(parts)
+        if not subj or not trm:
+            print(f"skip {path}: cannot infer subject/term (use --subject/--term)", file=sys.stderr)
+            continue
+        try:
+            texts, title = _extract_questions(path)
+        except Exception as e:
+            print(f"skip {path}: {e}", file=sys.stderr)
+            continue
+        year = _extract_year_from_title(os.path.basename(path)) or _extract_year_from_title(title) or 0
+        key = bank_key(subj, trm)
+        for text in texts:
+            counters[key] = counters.get(key, 0) + 1
+            questions.append({
+                "id": f"{year or 'u'}-{counters[key]}",
+                "year": int(year),
+                "subject": subj,
+                "term": trm,
+                "text": text,
+                "type": "general",
+                "choices": None,
+                "answer": None,
+            })
+
+    groups: Dict[str, Dict[int, List[dict]]] = {}
+    for q in questions:
+        groups.setdefault(bank_key(q["subject"], q["term"]), {}).setdefault(q["year"], []).append(q)
+    return [q for papers in groups.values() for qs in merge_near_duplicates(papers).values() for q in qs]
+
+
+_bank_lock = threading.Lock()
+_bank: Optional[QuestionBank] = None
+_bank_loaded = False
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """The configured bank (EXAM_QUESTION_BANK_PATH, default exam_mode/question_bank.tqb), if present."""
+    global _bank, _bank_loaded
+    with _bank_lock:
+        if not _bank_loaded:
+            _bank_loaded = True
+            path = os.environ.get("EXAM_QUESTION_BANK_PATH", DEFAULT_BANK_PATH)
+            if path and os.path.exists(path):
+                try:
+                    _bank = QuestionBank(path)
+                except (OSError, ValueError):
+                    _bank = None
+        return _bank
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m exam_mode.question_bank", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="parse PDFs/HTML pages into a bank file")
+    p_ingest.add_argument("sources", nargs="+", help="files or directories to ingest")
+    p_ingest.add_argument("--out", default=DEFAULT_BANK_PATH, help="bank file to write")
+    p_ingest.add_argument("--subject", help="subject for every source (default: inferred from path)")
+    p_ingest.add_argument("--term", help="term for every source (default: inferred from path)")
+
+    p_show = sub.add_parser("show", help="print block counts of a bank file")
+    p_show.add_argument("path", nargs="?", default=DEFAULT_BANK_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        questions = ingest(args.sources, subject=args.subject, term=args.term)
+        if not questions:
+            print("no questions found", file=sys.stderr)
+            return 1
+        counts = write_bank(args.out, questions)
+        print(f"wrote {sum(counts.values())} questions in {len(counts)} blocks to {args.out}")
+        return 0
+
+    for key, count in QuestionBank(args.path).summary().items():
+        print(f"{count:6d}  {key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
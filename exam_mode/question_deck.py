@@ -0,0 +1,163 @@
+from __future__ import annotations
+import random
+import sys
+import zlib
+from typing import Dict, Optional
+
+from .paper_set import PaperSet
+
+_MASK64 = (1 << 64) - 1
+# Unbounded paper sets are drawn in consecutive windows of this many
+# questions, each shuffled with the session seed.
+STREAM_WINDOW = 64
+
+
+def _mix(x: int) -> int:
+    # splitmix64 finalizer
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def permute(i: int, n: int, seed: int) -> int:
+    """Position ``i`` of a seeded pseudo-random permutation of range(n), in O(1) memory.
+
+    A 4-round Feistel network over the smallest even-bit domain >= n,
+    cycle-walked back into range.
+    """
+    if n <= 1:
+        return 0
+    bits = max(2, (n - 1).bit_length())
+    bits += bits & 1
+    half = bits // 2
+    mask = (1 << half) - 1
+    x = i
+    while True:
+        left, right = x >> half, x & mask
+        for rnd in range(4):
+            left, right = right, left ^ (_mix(seed ^ (rnd << 56) ^ right) & mask)
+        x = (left << half) | right
+        if x < n:
+            return x
+
+
+class QuestionDeck:
+    """Compact per-session draw state over a shared PaperSet.
+
+    Only a seed, a reshuffle epoch, a cursor, a used-question bitmap and
+    per-type cursors are kept; the draw order is a seeded permutation
+    computed on the fly. ``draw`` skips questions already marked used and
+    reshuffles (new epoch, bitmap cleared) once every question was used.
+
+    Over an unbounded PaperSet (a question stream) there is nothing to
+    reshuffle: the deck walks the stream window by window and the bitmap
+    grows only as far as the questions actually drawn.
+    """
+
+    __slots__ = ("seed", "epoch", "pos", "used", "type_pos")
+
+    def __init__(
+        self,
+        size: int,
+        seed: Optional[int] = None,
+        epoch: int = 0,
+        pos: int = 0,
+        used: Optional[bytearray] = None,
+        type_pos: Optional[Dict[str, int]] = None,
+    ):
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.epoch = epoch
+        self.pos = pos
+        self.used = used if used is not None else bytearray((size + 7) // 8)
+        self.type_pos: Dict[str, int] = type_pos if type_pos is not None else {}
+
+    @classmethod
+    def for_papers(cls, papers: PaperSet, **kwargs) -> "QuestionDeck":
+        return cls(0 if papers.unbounded else papers.question_count, **kwargs)
+
+    def approx_bytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.used) + sys.getsizeof(self.type_pos)
+
+    def is_used(self, index: int) -> bool:
+        byte = index >> 3
+        return byte < len(self.used) and bool(self.used[byte] & (1 << (index & 7)))
+
+    def mark_used(self, index: int) -> None:
+        byte = index >> 3
+        if byte >= len(self.used):
+            self.used.extend(bytes(byte + 1 - len(self.used)))
+        self.used[byte] |= 1 << (index & 7)
+
+    def used_count(self) -> int:
+        return sum(bin(b).count("1") for b in self.used)
+
+    def _order_seed(self, salt: str = "") -> int:
+        return _mix((self.seed << 32) ^ (self.epoch << 16) ^ zlib.crc32(salt.encode("utf-8")))
+
+    def draw(self, papers: PaperSet) -> int:
+        """Index of the next unused question (marked used).
+
+        When the deck runs out, the bitmap is cleared and the order
+        reshuffled, so no question repeats until all have been asked.
+        """
+        if papers.unbounded:
+            return self._draw_stream()
+        n = papers.question_count
+        if not n:
+            raise ValueError("No papers loaded")
+        seed = self._order_seed()
+        while self.pos < n and self.is_used(permute(self.pos, n, seed)):
+            self.pos += 1
+        if self.pos >= n:
+            self.used = bytearray(len(self.used))
+            self.epoch += 1
+            self.pos = 0
+            self.type_pos.clear()
+            seed = self._order_seed()
+        index = permute(self.pos, n, seed)
+        self.pos += 1
+        self.mark_used(index)
+        return index
+
+    def _stream_index(self, pos: int) -> int:
+        window, offset = divmod(pos, STREAM_WINDOW)
+        return window * STREAM_WINDOW + permute(offset, STREAM_WINDOW, self._order_seed(str(window)))
+
+    def _draw_stream(self) -> int:
+        while self.is_used(self._stream_index(self.pos)):
+            self.pos += 1
+        index = self._stream_index(self.pos)
+        self.pos += 1
+        self.mark_used(index)
+        return index
+
+    def draw_same_type(self, papers: PaperSet, qtype: Optional[str]) -> Optional[int]:
+        """Index of the next unused question of ``qtype`` (marked used), or None if all are used."""
+        key = qtype or "general"
+        if papers.unbounded:
+            pos = self.type_pos.get(key, 0)
+            index = papers.nth_of_type(key, pos)
+            while index is not None and self.is_used(index):
+                pos += 1
+                index = papers.nth_of_type(key, pos)
+            if index is None:
+                return None
+            self.type_pos[key] = pos + 1
+            self.mark_used(index)
+            return index
+        indices = papers.type_indices(key)
+        m = len(indices)
+        if not m:
+            return None
+        seed = self._order_seed(key)
+        pos = self.type_pos.get(key, 0)
+        while pos < m and self.is_used(indices[permute(pos, m, seed)]):
+            pos += 1
+        if pos >= m:
+            self.type_pos[key] = pos
+            return None
+        index = indices[permute(pos, m, seed)]
+        self.type_pos[key] = pos + 1
+        self.mark_used(index)
+        return index
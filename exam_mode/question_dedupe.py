@@ -0,0 +1,128 @@
+from __future__ import annotations
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+# Near-duplicate detection for questions scraped from several papers/years.
+# Each question is reduced to word-bigram shingles, summarized by a MinHash
+# signature and bucketed with LSH (bands of rows); only questions sharing a
+# bucket are compared, by exact Jaccard similarity of their shingle sets.
+# Numbers are left out of the shingles and must match exactly instead, so
+# the same word problem with different figures is never merged.
+
+NUM_PERM = 32
+BANDS = 8  # rows per band = NUM_PERM // BANDS
+SHINGLE_WORDS = 2
+SIMILARITY_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed (a, b) pairs so signatures are stable across processes.
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    ((zlib.crc32(f"a{i}".encode()) << 29 | zlib.crc32(f"c{i}".encode())) % _MERSENNE_PRIME or 1,
+     (zlib.crc32(f"b{i}".encode()) << 29 | zlib.crc32(f"d{i}".encode())) % _MERSENNE_PRIME)
+    for i in range(NUM_PERM)
+]
+_TOKEN = re.compile(r"[^\W_]+", flags=re.UNICODE)
+
+
+def _split_tokens(text: str) -> Tuple[List[str], Tuple[str, ...]]:
+    """(word tokens, numeric tokens in order); a token with any digit counts as numeric."""
+    words: List[str] = []
+    numbers: List[str] = []
+    for tok in _TOKEN.findall((text or "").lower()):
+        (numbers if any(ch.isdigit() for ch in tok) else words).append(tok)
+    return words, tuple(numbers)
+
+
+def numbers(text: str) -> Tuple[str, ...]:
+    return _split_tokens(text)[1]
+
+
+def shingles(text: str) -> Set[int]:
+    """Word-bigram shingles of ``text``, ignoring numeric tokens."""
+    return _shingles(_split_tokens(text)[0])
+
+
+def _shingles(tokens: List[str]) -> Set[int]:
+    if len(tokens) < SHINGLE_WORDS:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))} if tokens else set()
+    return {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_WORDS]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash(sh: Set[int]) -> Tuple[int, ...]:
+    if not sh:
+        return tuple([_MERSENNE_PRIME] * NUM_PERM)
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in sh) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """LSH index that maps each added text to the first near-identical text seen."""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._rows = NUM_PERM // BANDS
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._shingles: List[Set[int]] = []
+        self._numbers: List[Tuple[str, ...]] = []
+
+    def add(self, text: str) -> Optional[int]:
+        """Register ``text``; returns the id of an earlier near-duplicate, or None if it is new.
+
+        New texts get ids 0, 1, 2, ... in insertion order. A near-duplicate
+        must also contain exactly the same numbers, in the same order.
+        """
+        words, nums = _split_tokens(text)
+        sh = _shingles(words)
+        sig = minhash(sh)
+        bands = [(b, sig[b * self._rows:(b + 1) * self._rows]) for b in range(BANDS)]
+
+        checked: Set[int] = set()
+        for band in bands:
+            for cand in self._buckets.get(band, ()):
+                if cand in checked:
+                    continue
+                checked.add(cand)
+                if self._numbers[cand] == nums and jaccard(sh, self._shingles[cand]) >= self.threshold:
+                    return cand
+
+        new_id = len(self._shingles)
+        self._shingles.append(sh)
+        self._numbers.append(nums)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(new_id)
+        return None
+
+
+def merge_near_duplicates(papers: Dict[int, List[dict]], threshold: float = SIMILARITY_THRESHOLD) -> Dict[int, List[dict]]:
+    """Collapse near-duplicate questions across all years of a paper set.
+
+    The earliest occurrence (known years before year 0) is kept and gets a
+    ``years`` list with every year the question appeared in; later copies
+    are dropped, as are years left without questions. Input is not mutated.
+    """
+    index = NearDuplicateIndex(threshold)
+    kept: List[dict] = []
+    for year in sorted(papers, key=lambda y: (y == 0, y)):
+        for q in papers[year]:
+            dup = index.add(q.get("text") or "")
+            if dup is None:
+                q = dict(q)
+                q["years"] = [year] if year else []
+                kept.append(q)
+            elif year and year not in kept[dup]["years"]:
+                kept[dup]["years"].append(year)
+
+    out: Dict[int, List[dict]] = {}
+    for q in kept:
+        q["years"].sort()
+        out.setdefault(int(q.get("year") or 0), []).append(q)
+    return out
@@ -0,0 +1,336 @@
+from __future__ import annotations
+import base64
+import json
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from .paper_set import PaperSet, find_interned
+from .question_deck import QuestionDeck
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SessionState:
+    # Slotted: a long-running worker can hold thousands of these.
+    __slots__ = (
+        "session_id", "mode", "term", "subject", "papers", "deck",
+        "points", "streak", "badges", "readiness_percent", "last_index", "last_updated",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        mode: str,
+        term: str,
+        subject: str,
+        papers: Optional[PaperSet] = None,
+        deck: Optional[QuestionDeck] = None,
+        points: int = 0,
+        streak: int = 0,
+        badges: Optional[set] = None,
+        readiness_percent: int = 0,
+        last_index: Optional[int] = None,
+        last_updated: Optional[datetime] = None,
+    ):
+        self.session_id = session_id
+        self.mode = mode
+        self.term = term
+        self.subject = subject
+        # Shared with the paper cache and other sessions; per-session draw
+        # state lives in ``deck`` and ``last_index``.
+        self.papers = papers
+        self.deck = deck
+        self.points = points
+        self.streak = streak
+        self.badges: set = badges if badges is not None else set()
+        self.readiness_percent = readiness_percent
+        self.last_index = last_index
+        self.last_updated: datetime = last_updated or datetime.utcnow()
+
+    @property
+    def last_question(self) -> Optional[dict]:
+        if self.papers is None or self.last_index is None:
+            return None
+        return self.papers.question(self.last_index)
+
+    def approx_bytes(self) -> int:
+        """Memory owned by this session (the paper set itself is shared with the cache)."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.badges)
+        if self.deck is not None:
+            size += self.deck.approx_bytes()
+        return size
+
+
+# Resolves a paper set from (subject, term) when a session is loaded in a
+# process that has not interned it yet (normally exam_utils.scrape_papers).
+PaperResolver = Callable[[str, str], PaperSet]
+
+
+def encode_session(state: SessionState) -> Dict[str, Any]:
+    """Compact, JSON-safe form of a session: the paper set is stored by key and digest only."""
+    deck = state.deck
+    return {
+        "id": state.session_id,
+        "mode": state.mode,
+        "term": state.term,
+        "subject": state.subject,
+        "papers": [state.papers.key, state.papers.digest] if state.papers is not None else None,
+        "deck": [
+            deck.seed, deck.epoch, deck.pos,
+            base64.b64encode(bytes(deck.used)).decode("ascii"), deck.type_pos,
+        ] if deck is not None else None,
+        "points": state.points,
+        "streak": state.streak,
+        "badges": sorted(state.badges),
+        "readiness": state.readiness_percent,
+        "last": state.last_index,
+        "updated": state.last_updated.isoformat(),
+    }
+
+
+def decode_session(data: Dict[str, Any], resolve: PaperResolver) -> SessionState:
+    state = SessionState(
+        session_id=data["id"],
+        mode=data["mode"],
+        term=data["term"],
+        subject=data["subject"],
+        points=data.get("points", 0),
+        streak=data.get("streak", 0),
+        badges=set(data.get("badges") or ()),
+        readiness_percent=data.get("readiness", 0),
+        last_updated=datetime.fromisoformat(data["updated"]),
+    )
+    ref = data.get("papers")
+    if ref:
+        key, digest = ref
+        papers = find_interned(key, digest) or resolve(state.subject, state.term)
+        state.papers = papers
+        deck = data.get("deck")
+        if papers.digest == digest and deck:
+            seed, epoch, pos, used, type_pos = deck
+            state.deck = QuestionDeck.for_papers(
+                papers, seed=seed, epoch=epoch, pos=pos,
+                used=bytearray(base64.b64decode(used)), type_pos=dict(type_pos),
+            )
+            state.last_index = data.get("last")
+        else:
+            # The paper set was re-scraped since: start a fresh deck on the new one.
+            state.deck = QuestionDeck.for_papers(papers)
+    return state
+
+
+class SessionStore(ABC):
+    """Where ExamService keeps sessions.
+
+    ``get`` returns None for unknown or expired sessions; callers ``put``
+    a session back after changing it. Stores that serialize (SQLite) hand
+    out a fresh SessionState per ``get``.
+    """
+
+    backend = "base"
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    def put(self, state: SessionState) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL; returns how many were removed."""
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process sessions, least recently used evicted first beyond ``max_sessions``."""
+
+    backend = "memory"
+
+    def __init__(self, max_sessions: int = 5000, idle_ttl_seconds: float = 2 * 3600):
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._max_sessions = max(1, int(max_sessions))
+        self._idle_ttl = timedelta(seconds=idle_ttl_seconds)
+        self._evicted = 0
+        self._expired = 0
+
+    def _is_expired(self, state: SessionState, now: datetime) -> bool:
+        return now - state.last_updated > self._idle_ttl
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            state = self.sessions.get(session_id)
+            if state is None:
+                return None
+            if self._is_expired(state, datetime.utcnow()):
+                del self.sessions[session_id]
+                self._expired += 1
+                return None
+            self.sessions.move_to_end(session_id)
+            return state
+
+    def put(self, state: SessionState) -> None:
+        with self._lock:
+            if self.sessions.get(state.session_id) is state:
+                self.sessions.move_to_end(state.session_id)
+                return
+            self.sessions.pop(state.session_id, None)
+            self.sessions[state.session_id] = state
+            while len(self.sessions) > self._max_sessions:
+                self.sessions.popitem(last=False)
+                self._evicted += 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            stale = [sid for sid, st in self.sessions.items() if self._is_expired(st, now)]
+            for sid in stale:
+                del self.sessions[sid]
+            self._expired += len(stale)
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "live_sessions": len(self.sessions),
+                "approx_bytes": sum(st.approx_bytes() for st in self.sessions.values()),
+                "max_sessions": self._max_sessions,
+                "idle_ttl_seconds": int(self._idle_ttl.total_seconds()),
+                "evicted": self._evicted,
+                "expired": self._expired,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file (WAL), shared by every worker process on the host.
+
+    Rows hold the compact encoding from ``encode_session``; paper sets are
+    re-resolved by key through ``resolve`` (the shared paper cache), so a
+    row is a few hundred bytes regardless of paper size.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        resolve: PaperResolver,
+        max_sessions: int = 5000,
+        idle_ttl_seconds: float = 2 * 3600,
+    ):
+        self._path = path
+        self._resolve = resolve
+        self._max_sessions = max(1, int(max_sessions))
+        self._idle_ttl = float(idle_ttl_seconds)
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, payload TEXT NOT NULL, last_updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_updated ON sessions (last_updated)")
+        self._conn.commit()
+
+    @staticmethod
+    def _ts(dt: datetime) -> float:
+        return (dt - _EPOCH).total_seconds()
+
+    def _cutoff(self) -> float:
+        return self._ts(datetime.utcnow()) - self._idle_ttl
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, last_updated FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < self._cutoff():
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._conn.commit()
+                self._expired += 1
+                return None
+        return decode_session(json.loads(row[0]), self._resolve)
+
+    def put(self, state: SessionState) -> None:
+        payload = json.dumps(encode_session(state), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, payload, last_updated) VALUES (?, ?, ?)",
+                (state.session_id, payload, self._ts(state.last_updated)),
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM sessions WHERE last_updated < ?", (self._cutoff(),)).rowcount
+            # Enforce the cap by dropping the least recently updated rows.
+            evicted = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                " SELECT session_id FROM sessions ORDER BY last_updated DESC LIMIT -1 OFFSET ?)",
+                (self._max_sessions,),
+            ).rowcount
+            self._conn.commit()
+            self._expired += expired
+            self._evicted += evicted
+            return expired
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "backend": self.backend,
+            "path": self._path,
+            "live_sessions": count,
+            "approx_bytes": size,
+            "max_sessions": self._max_sessions,
+            "idle_ttl_seconds": int(self._idle_ttl),
+            "evicted": self._evicted,
+            "expired": self._expired,
+        }
+
+
+DEFAULT_SESSION_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exam_sessions.sqlite3")
+
+
+def make_session_store(resolve: PaperResolver, max_sessions: int, idle_ttl_seconds: float) -> SessionStore:
+    """Store selected by EXAM_SESSION_STORE: "memory" (default) or "sqlite" (EXAM_SESSION_DB path)."""
+    backend = os.environ.get("EXAM_SESSION_STORE", "memory").strip().lower()
+    if backend == "sqlite":
+        path = os.environ.get("EXAM_SESSION_DB", DEFAULT_SESSION_DB)
+        return SQLiteSessionStore(path, resolve, max_sessions=max_sessions, idle_ttl_seconds=idle_ttl_seconds)
+    if backend != "memory":
+        raise ValueError(f"Unknown EXAM_SESSION_STORE backend: {backend!r}")
+    return MemorySessionStore(max_sessions=max_sessions, idle_ttl_seconds=idle_ttl_seconds)
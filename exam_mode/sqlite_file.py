@@ -0,0 +1,56 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+
+# Shared plumbing for the SQLite files that only hold rebuildable data (the
+# paper cache and the crawl state): losing one must never fail a request.
+
+
+class SQLiteFile:
+    """A SQLite file (WAL) opened on first use, that switches itself off on any error.
+
+    ``schema`` runs once on the new connection. If the file cannot be
+    created, or any statement raises ``sqlite3.Error``, the file is
+    disabled for the rest of the process and ``run`` returns None from
+    then on. ``path=None`` starts disabled.
+    """
+
+    def __init__(self, path: Optional[str], schema: Callable[[sqlite3.Connection], None]):
+        self._path = path
+        self._schema = schema
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = not path
+
+    @property
+    def enabled(self) -> bool:
+        return not self._disabled
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._schema(conn)
+            conn.commit()
+            self._conn = conn
+        except (sqlite3.Error, OSError):
+            self._disabled = True
+        return self._conn
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """``fn(conn)`` under the file's lock; None if the file is (or just became) disabled."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                return fn(conn)
+            except sqlite3.Error:
+                self._disabled = True
+                self._conn = None
+                return None
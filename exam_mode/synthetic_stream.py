@@ -0,0 +1,202 @@
+from __future__ import annotations
+import math
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .paper_set import QuestionStream
+
+# Offline/practice fallback: an unbounded, seeded stream of type-tagged
+# questions. Question i is derived from (seed, i) alone, so nothing is
+# generated until asked for and every process sees the same stream.
+
+_Template = Callable[[random.Random], Tuple[str, str]]
+
+
+def _add(r: random.Random) -> Tuple[str, str]:
+    a, b = r.randint(2, 99), r.randint(2, 99)
+    return f"What is {a} + {b}?", str(a + b)
+
+
+def _multiply(r: random.Random) -> Tuple[str, str]:
+    a, b = r.randint(2, 15), r.randint(2, 15)
+    return f"Compute {a} x {b}", str(a * b)
+
+
+def _linear(r: random.Random) -> Tuple[str, str]:
+    x, a, b = r.randint(1, 12), r.randint(2, 9), r.randint(1, 30)
+    return f"Solve for x: {a}x + {b} = {a * x + b}", str(x)
+
+
+def _expand(r: random.Random) -> Tuple[str, str]:
+    a, x = r.randint(2, 9), r.randint(1, 10)
+    b = r.randint(1, 9)
+    return f"If x = {x}, find the value of {a}(x + {b})", str(a * (x + b))
+
+
+def _rectangle(r: random.Random) -> Tuple[str, str]:
+    w, h = r.randint(2, 20), r.randint(2, 20)
+    return f"Find the area of a rectangle {w} cm long and {h} cm wide (in cm²).", str(w * h)
+
+
+def _triangle_angle(r: random.Random) -> Tuple[str, str]:
+    a, b = r.randint(20, 80), r.randint(20, 80)
+    return f"Two angles of a triangle are {a}° and {b}°. Find the third angle (in degrees).", str(180 - a - b)
+
+
+def _hcf(r: random.Random) -> Tuple[str, str]:
+    g = r.randint(2, 12)
+    a, b = g * r.choice([2, 3, 5, 7]), g * r.choice([4, 9, 11, 13])
+    while b == a:
+        b += g
+    return f"Find the highest common factor of {a} and {b}.", str(math.gcd(a, b))
+
+
+def _percent(r: random.Random) -> Tuple[str, str]:
+    p, whole = r.choice([10, 20, 25, 50, 75]), r.randint(1, 20) * 20
+    return f"What is {p}% of {whole}?", str(whole * p // 100)
+
+
+def _dice(r: random.Random) -> Tuple[str, str]:
+    k = r.randint(1, 5)
+    return f"A fair die is rolled. How many outcomes give a number greater than {k}?", str(6 - k)
+
+
+def _marbles(r: random.Random) -> Tuple[str, str]:
+    red, blue = r.randint(1, 9), r.randint(1, 9)
+    return f"A bag has {red} red and {blue} blue marbles. How many marbles are there in total?", str(red + blue)
+
+
+def _speed(r: random.Random) -> Tuple[str, str]:
+    v, t = r.randint(2, 20), r.randint(2, 10)
+    return f"A cyclist moves at {v} m/s for {t} s. How far does the cyclist travel (in m)?", str(v * t)
+
+
+def _density(r: random.Random) -> Tuple[str, str]:
+    d, vol = r.randint(2, 9), r.randint(2, 12)
+    return f"An object has density {d} g/cm³ and volume {vol} cm³. What is its mass (in g)?", str(d * vol)
+
+
+def _atoms(r: random.Random) -> Tuple[str, str]:
+    name, formula, count = r.choice([
+        ("water", "H2O", 3), ("carbon dioxide", "CO2", 3), ("methane", "CH4", 5),
+        ("ammonia", "NH3", 4), ("glucose", "C6H12O6", 24),
+    ])
+    return f"How many atoms are in one molecule of {name} ({formula})?", str(count)
+
+
+def _body_facts(r: random.Random) -> Tuple[str, str]:
+    q, a = r.choice([
+        ("How many chambers does the human heart have?", "4"),
+        ("How many pairs of chromosomes does a human body cell have?", "23"),
+        ("How many sets of teeth does a human grow in a lifetime?", "2"),
+    ])
+    return q, a
+
+
+def _plural(r: random.Random) -> Tuple[str, str]:
+    word, plural = r.choice([
+        ("child", "children"), ("mouse", "mice"), ("tooth", "teeth"),
+        ("leaf", "leaves"), ("box", "boxes"), ("city", "cities"),
+    ])
+    return f"Write the plural of '{word}'.", plural
+
+
+def _past_tense(r: random.Random) -> Tuple[str, str]:
+    verb, past = r.choice([
+        ("go", "went"), ("write", "wrote"), ("buy", "bought"),
+        ("see", "saw"), ("teach", "taught"), ("run", "ran"),
+    ])
+    return f"Write the past tense of '{verb}'.", past
+
+
+def _count_words(r: random.Random) -> Tuple[str, str]:
+    sentence = r.choice([
+        "The students planted trees near the school",
+        "Kamal reads a book every evening",
+        "Rain fell softly on the paddy fields",
+    ])
+    return f"How many words are in this sentence: \"{sentence}\"?", str(len(sentence.split()))
+
+
+_TEMPLATES: Dict[str, Sequence[_Template]] = {
+    "algebra": (_linear, _expand),
+    "geometry": (_rectangle, _triangle_angle),
+    "number_theory": (_hcf, _percent, _multiply),
+    "probability": (_dice, _marbles),
+    "physics": (_speed, _density),
+    "chemistry": (_atoms,),
+    "biology": (_body_facts,),
+    "grammar": (_plural, _past_tense),
+    "comprehension": (_count_words,),
+    "essay": (_plural, _count_words),
+}
+_DEFAULT_TEMPLATES: Sequence[_Template] = (_add, _multiply)
+_ID = re.compile(r"^syn-(\d+)$")
+
+
+def _choices(r: random.Random, answer: str) -> List[str]:
+    if answer.lstrip("-").isdigit():
+        n = int(answer)
+        opts = {answer}
+        while len(opts) < 4:
+            opts.add(str(n + r.choice([-3, -2, -1, 1, 2, 3, 10])))
+        out = sorted(opts)
+    else:
+        out = [answer, answer + "s", answer[:-1] or answer + "e", answer.upper()]
+        out = list(dict.fromkeys(out))
+    r.shuffle(out)
+    return out
+
+
+class SyntheticQuestionStream(QuestionStream):
+    """Question ``i`` has type ``topics[i % len(topics)]``; every other round is multiple choice."""
+
+    def __init__(self, subject: str, term: str, topics: Sequence[str], seed: int):
+        self.subject = subject
+        self.term = term
+        self.topics: List[str] = list(topics) or ["general"]
+        self.seed = int(seed)
+
+    def question(self, index: int) -> dict:
+        if index < 0:
+            raise IndexError(index)
+        r = random.Random(f"{self.seed}:{index}")
+        k = len(self.topics)
+        topic = self.topics[index % k]
+        text, answer = r.choice(_TEMPLATES.get(topic, _DEFAULT_TEMPLATES))(r)
+        is_mcq = (index // k) % 2 == 0
+        return {
+            "id": f"syn-{index}",
+            "year": 0,
+            "subject": self.subject,
+            "term": self.term,
+            "text": f"[{topic.upper()}] {text}",
+            "type": topic,
+            "choices": _choices(r, answer) if is_mcq else None,
+            "answer": answer,
+        }
+
+    def index_of(self, question_id: str) -> Optional[int]:
+        m = _ID.match(question_id or "")
+        return int(m.group(1)) if m else None
+
+    def nth_of_type(self, qtype: str, n: int) -> Optional[int]:
+        if qtype not in self.topics:
+            return None
+        return n * len(self.topics) + self.topics.index(qtype)
+
+    def spec(self) -> Dict[str, Any]:
+        return {
+            "kind": "synthetic",
+            "subject": self.subject,
+            "term": self.term,
+            "topics": self.topics,
+            "seed": self.seed,
+        }
+
+
+def stream_from_spec(spec: Dict[str, Any]) -> QuestionStream:
+    if spec.get("kind") != "synthetic":
+        raise ValueError(f"Unknown question stream kind: {spec.get('kind')!r}")
+    return SyntheticQuestionStream(spec["subject"], spec["term"], spec["topics"], spec["seed"])
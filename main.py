@@ -14,6 +14,9 @@ from gamification_router import router as gamification_router
 from voice_router import router as voice_router
 from multimodal_router import router as multimodal_router
 from exam_mode.exam_routes import router as exam_mode_router
+from exam_mode.cache_warmer import cache_warmer, warming_enabled
+from exam_mode.exam_messages import get_setup_questions
+from exam_mode.intent_matcher import matcher as intent_matcher
 
 # Initialize Groq client
 client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
@@ -38,6 +41,18 @@ if not _is_vercel:
         # Serve UI from /app/ so relative asset links resolve correctly
         return RedirectResponse(url="/app/")
 
+
+@app.on_event("startup")
+def _start_paper_cache_warmer():
+    # Serverless instances are short-lived; warming only pays off on long-running servers.
+    if not _is_vercel and warming_enabled():
+        cache_warmer.start()
+
+
+@app.on_event("shutdown")
+def _stop_paper_cache_warmer():
+    cache_warmer.stop()
+
 # Enable CORS
 _allowed_origins_env = os.environ.get("ALLOWED_ORIGINS")
 _allowed_origins = ["*"]
@@ -145,15 +160,11 @@ async def ask(req: AskRequest):
                     f"From '{topic}': Q: {entry['question']} → A: {entry['answer']}"
                 )
 
-    # Simple off-syllabus detection (subject match against common Grade 9 subjects)
-    allowed_subjects = {
-        "math", "maths", "mathematics", "science", "english",
-        "sinhala", "history", "geography", "health", "civics"
-    }
-    off_syllabus = False
+    # Exam Mode trigger phrases (incl. Sinhala), matched in one pass.
+    # Off-syllabus means the selected subject is not a Grade 9 subject.
+    intent = intent_matcher.analyze(req.student_question)
     subj_key = (req.subject or "general").strip().lower()
-    if subj_key and subj_key not in allowed_subjects and subj_key != "general":
-        off_syllabus = True
+    off_syllabus = subj_key not in ("", "general") and intent_matcher.canonical_subject(subj_key) is None
 
     # System persona: The Tutor for Grade 9 Sri Lanka (concise, used as system message)
     system_prompt = (
@@ -209,7 +220,10 @@ async def ask(req: AskRequest):
             "off_syllabus": off_syllabus
         })
 
-        return {"answer": answer, "off_syllabus": off_syllabus}
+        result = {"answer": answer, "off_syllabus": off_syllabus, "exam_mode_triggered": intent.exam_trigger}
+        if intent.exam_trigger:
+            result["setup_questions"] = get_setup_questions()
+        return result
     except Exception as e:
         return {"error": f"AI request failed: {str(e)}"}
 
@@ -1,10 +1,18 @@
+import bisect
+import hashlib
 import json
 import os
 import threading
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, List, Optional, Tuple
 
 
+def _email_key(email: Optional[str]) -> str:
+    return (email or "guest@student.com").strip().lower()
+
+
 def _safe_topic_key(topic: str) -> str:
     t = (topic or "general").strip().lower()
     return t or "general"
@@ -14,6 +22,65 @@ def _clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
 
+# Per-user attempt history is a fixed-capacity ring buffer stored inline in the
+# JSON document: {"cap": N, "head": i, "items": [[topic, correct, score, qref], ...]}.
+# Once full, "head" points at the oldest record, which the next push overwrites.
+EVENTS_CAPACITY = 200
+
+
+def _question_ref(question: Optional[str]) -> str:
+    """Short stable reference for the question text (we don't keep the text itself)."""
+    text = (question or "").strip()[:500]
+    if not text:
+        return ""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _ring_new(cap: int = EVENTS_CAPACITY) -> Dict[str, Any]:
+    return {"cap": cap, "head": 0, "items": []}
+
+
+def _ring_from_legacy(events: Any) -> Dict[str, Any]:
+    """Convert the old list-of-dicts event log into a ring buffer."""
+    ring = _ring_new()
+    for e in (events or [])[-EVENTS_CAPACITY:]:
+        if not isinstance(e, dict):
+            continue
+        _ring_push(
+            ring,
+            [
+                _safe_topic_key(e.get("topic")),
+                1 if e.get("correct") else 0,
+                int(e.get("score") or 0),
+                _question_ref(e.get("question")),
+            ],
+        )
+    return ring
+
+
+def _ring_push(ring: Dict[str, Any], record: List[Any]) -> None:
+    items = ring["items"]
+    cap = int(ring.get("cap") or EVENTS_CAPACITY)
+    if len(items) < cap:
+        items.append(record)
+        return
+    head = int(ring.get("head") or 0) % cap
+    items[head] = record
+    ring["head"] = (head + 1) % cap
+
+
+def _ring_tail(ring: Dict[str, Any], n: int) -> List[List[Any]]:
+    """Return the newest ``n`` records, oldest first."""
+    items = ring["items"]
+    size = len(items)
+    n = min(n, size)
+    if n <= 0:
+        return []
+    # "head" stays at 0 until the buffer fills up, so this holds in both phases.
+    end = (int(ring.get("head") or 0) - 1) % size  # index of the newest record
+    return [items[(end - n + 1 + i) % size] for i in range(n)]
+
+
 @dataclass
 class UserProfile:
     email: str
@@ -37,10 +104,152 @@ class TopicProgress:
         return self.correct / self.questions_answered
 
 
-class PersonalizationStore:
-    """Simple JSON-file backed store.
+# Adaptive difficulty looks at each topic's own last DIFFICULTY_WINDOW attempts,
+# kept as a bit window on the topic: "recent" (newest attempt in the lowest
+# bit, 1 = correct) and "recent_n" (how many bits are valid). Both are
+# internal and left out of snapshots.
+DIFFICULTY_WINDOW = 10
+_WINDOW_MASK = (1 << DIFFICULTY_WINDOW) - 1
+_WINDOW_FIELDS = ("recent", "recent_n")
+
+
+def adapt_difficulty(t: Dict[str, Any], correct: bool) -> int:
+    """Push one attempt into the topic's rolling window and return its new difficulty.
+
+    Constant time and deterministic: the result depends only on the topic's
+    previous state and ``correct``, so a recorded attempt sequence can be
+    replayed through this function to reproduce the stored difficulty.
+    """
+    bits = ((int(t.get("recent") or 0) << 1) | (1 if correct else 0)) & _WINDOW_MASK
+    n = min(int(t.get("recent_n") or 0) + 1, DIFFICULTY_WINDOW)
+    t["recent"] = bits
+    t["recent_n"] = n
+
+    diff = int(t.get("difficulty") or 2)
+    if n >= 5:
+        acc = bin(bits).count("1") / n
+        if acc >= 0.8:
+            diff += 1
+        elif acc <= 0.45:
+            diff -= 1
+    t["difficulty"] = int(_clamp(diff, 1, 5))
+    return t["difficulty"]
+
+
+def _seed_window(t: Dict[str, Any], ring: Dict[str, Any], topic_key: str) -> None:
+    """Fill the rolling window of a topic stored before it had one from the event history."""
+    outcomes = [e[1] for e in _ring_tail(ring, len(ring["items"])) if e[0] == topic_key]
+    bits = 0
+    for c in outcomes[-DIFFICULTY_WINDOW:]:
+        bits = ((bits << 1) | (1 if c else 0)) & _WINDOW_MASK
+    t["recent"] = bits
+    t["recent_n"] = min(len(outcomes), DIFFICULTY_WINDOW)
+
+
+def _topic_progress(t: Dict[str, Any]) -> TopicProgress:
+    return TopicProgress(
+        topic=t["topic"],
+        questions_answered=int(t.get("questions_answered") or 0),
+        correct=int(t.get("correct") or 0),
+        score_total=int(t.get("score_total") or 0),
+        difficulty=int(t.get("difficulty") or 2),
+    )
+
+
+def _topic_rank_value(t: Dict[str, Any]) -> float:
+    q = int(t.get("questions_answered") or 0)
+    if q <= 0:
+        return 0.0
+    # Accuracy, weighted by experience a bit (same metric as _topic_strengths).
+    return (int(t.get("correct") or 0) / q) * min(1.0, q / 10)
+
+
+class _UserStats:
+    """Running aggregates for one user, updated per attempt instead of per read.
+
+    Mirrors what get_user_snapshot used to recompute on every call: overall
+    totals, the topic ranking behind _topic_strengths, and a difficulty
+    histogram for recommend_difficulty.
+    """
 
-    Data shape:
+    def __init__(self) -> None:
+        self.total_q = 0
+        self.total_correct = 0
+        self.total_score = 0
+        # Topic insertion order breaks ranking ties the same way a stable sort would.
+        self._order: Dict[str, int] = {}
+        self._rank_entries: Dict[str, Tuple[float, int, str]] = {}
+        self._ranking: List[Tuple[float, int, str]] = []
+        self._difficulties: Dict[str, int] = {}
+        self._difficulty_counts: Dict[int, int] = {}
+
+    @classmethod
+    def from_topics(cls, topics: Dict[str, Any]) -> "_UserStats":
+        stats = cls()
+        for key, t in (topics or {}).items():
+            stats.update_topic(key, None, t)
+        return stats
+
+    def update_topic(self, key: str, old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> None:
+        """Apply the change of one topic from ``old`` (None if new) to ``new``."""
+        if old is not None:
+            self.total_q -= int(old.get("questions_answered") or 0)
+            self.total_correct -= int(old.get("correct") or 0)
+            self.total_score -= int(old.get("score_total") or 0)
+        self.total_q += int(new.get("questions_answered") or 0)
+        self.total_correct += int(new.get("correct") or 0)
+        self.total_score += int(new.get("score_total") or 0)
+
+        order = self._order.setdefault(key, len(self._order))
+        prev = self._rank_entries.pop(key, None)
+        if prev is not None:
+            i = bisect.bisect_left(self._ranking, prev)
+            del self._ranking[i]
+        if int(new.get("questions_answered") or 0) > 0:
+            entry = (-_topic_rank_value(new), order, key)
+            bisect.insort(self._ranking, entry)
+            self._rank_entries[key] = entry
+
+        prev_diff = self._difficulties.get(key)
+        if prev_diff is not None:
+            self._difficulty_counts[prev_diff] -= 1
+            if not self._difficulty_counts[prev_diff]:
+                del self._difficulty_counts[prev_diff]
+        diff = int(new.get("difficulty") or 2)
+        self._difficulties[key] = diff
+        self._difficulty_counts[diff] = self._difficulty_counts.get(diff, 0) + 1
+
+    def strengths(self) -> Tuple[List[str], List[str]]:
+        strong = [k for _, _, k in self._ranking[:2]]
+        weak = [k for _, _, k in self._ranking[-2:]]
+        return strong, weak
+
+    def median_difficulty(self) -> int:
+        n = len(self._difficulties)
+        if not n:
+            return 2
+        target = n // 2
+        seen = 0
+        for diff in sorted(self._difficulty_counts):
+            seen += self._difficulty_counts[diff]
+            if seen > target:
+                return diff
+        return 2
+
+
+class PersonalizationStore:
+    """JSON-file backed store, hash-sharded by email and paged in lazily.
+
+    Users live in ``<file_path minus .json>_shards/shard_NNN.json``; an
+    email always maps to the same shard (crc32 % shard_count). Only shards
+    that a request touches are read, writes rewrite just that shard, and at
+    most ``max_resident_shards`` stay in memory (least recently used ones are
+    dropped). ``index.log`` is an append-only list of known emails, and
+    ``meta.json`` pins the shard count. A legacy single-file
+    ``personalization_data.json`` is served from memory and split into
+    shards on the first save.
+
+    Shard data shape:
       {
         "users": {
           "email": {
@@ -49,68 +258,285 @@ class PersonalizationStore:
               "algebra": {...},
               ...
             },
-            "events": [ ... ]
+            "events": {"cap": 200, "head": 0, "items": [[topic, correct, score, qref], ...]}
           }
         }
       }
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, shard_count: int = 64, max_resident_shards: int = 16):
         self._file_path = file_path
+        self._dir = os.path.splitext(file_path)[0] + "_shards"
         self._lock = threading.Lock()
-        self._data: Dict[str, Any] = {"users": {}}
+        self._shard_count = max(1, int(shard_count))
+        self._max_resident = max(1, int(max_resident_shards))
+        # shard id -> {"users": {...}}, in least-recently-used order
+        self._shards: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._known: Dict[str, int] = {}
+        # Derived, in-memory only: rebuilt from "topics" on first use after load.
+        self._stats: Dict[str, _UserStats] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        # Per-shard write counters so readers (e.g. cohort analytics) can cache derived views.
+        self._shard_versions: Dict[int, int] = {}
+        self._meta_written = False
+        # Legacy single-file users not yet written out as shards.
+        self._legacy_shards: Optional[Dict[int, Dict[str, Any]]] = None
         self._load()
 
     def _load(self) -> None:
+        # Nothing is written here (the app must import on a read-only
+        # filesystem): legacy users are served from memory, and the shard
+        # directory and meta.json appear on the first save.
+        if os.path.exists(self._meta_path()):
+            try:
+                with open(self._meta_path(), "r", encoding="utf-8") as f:
+                    self._shard_count = int((json.load(f) or {}).get("shard_count") or self._shard_count)
+            except Exception:
+                pass
+            self._meta_written = True
+            self._load_index()
+            return
+        self._read_legacy()
+
+    def _meta_path(self) -> str:
+        return os.path.join(self._dir, "meta.json")
+
+    def _load_index(self) -> None:
+        path = os.path.join(self._dir, "index.log")
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                email_key = line.strip()
+                if email_key:
+                    self._known[email_key] = self._shard_of(email_key)
+
+    def _read_legacy(self) -> None:
         if not os.path.exists(self._file_path):
             return
         try:
             with open(self._file_path, "r", encoding="utf-8") as f:
-                self._data = json.load(f) or {"users": {}}
+                legacy = json.load(f) or {}
         except Exception:
-            # If the JSON is corrupted, we keep a fresh in-memory data structure.
-            self._data = {"users": {}}
-
-    def _save(self) -> None:
-        os.makedirs(os.path.dirname(self._file_path) or ".", exist_ok=True)
-        tmp = self._file_path + ".tmp"
+            # If the JSON is corrupted, start from empty shards.
+            return
+        shards: Dict[int, Dict[str, Any]] = {}
+        for email_key, u in (legacy.get("users") or {}).items():
+            key = _email_key(email_key)
+            shards.setdefault(self._shard_of(key), {"users": {}})["users"][key] = u
+            self._known[key] = self._shard_of(key)
+        self._legacy_shards = shards
+
+    def _migrate_legacy(self) -> None:
+        """Split the legacy file into shards, then pin the layout in meta.json.
+
+        Shard files that already exist are left alone: they are either from an
+        interrupted earlier run (same content) or another worker that has since
+        written newer data. meta.json goes last, so a migration that did not
+        finish runs again on the next start.
+        """
+        shards = self._legacy_shards or {}
+        for shard_id, doc in shards.items():
+            if not os.path.exists(self._shard_path(shard_id)):
+                self._write_json(self._shard_path(shard_id), doc)
+        self._append_index([k for doc in shards.values() for k in doc["users"]])
+        self._write_json(self._meta_path(), {"shard_count": self._shard_count})
+        self._meta_written = True
+        self._legacy_shards = None
+
+    def _shard_of(self, email_key: str) -> int:
+        return zlib.crc32(email_key.encode("utf-8")) % self._shard_count
+
+    def _shard_path(self, shard_id: int) -> str:
+        return os.path.join(self._dir, f"shard_{shard_id:03d}.json")
+
+    @staticmethod
+    def _write_json(path: str, doc: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, self._file_path)
+            json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _append_index(self, email_keys: List[str]) -> None:
+        if not email_keys:
+            return
+        os.makedirs(self._dir, exist_ok=True)
+        with open(os.path.join(self._dir, "index.log"), "a", encoding="utf-8") as f:
+            f.write("".join(k + "\n" for k in email_keys))
+        for k in email_keys:
+            self._known[k] = self._shard_of(k)
+
+    def _read_shard(self, shard_id: int) -> Dict[str, Any]:
+        path = self._shard_path(shard_id)
+        if not os.path.exists(path):
+            if self._legacy_shards is not None and shard_id in self._legacy_shards:
+                return self._legacy_shards[shard_id]
+            return {"users": {}}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f) or {"users": {}}
+        except Exception:
+            # A corrupted shard only loses the users stored in it.
+            return {"users": {}}
+
+    def _shard(self, shard_id: int) -> Dict[str, Any]:
+        """Return a resident shard, paging it in (and evicting idle ones) as needed."""
+        doc = self._shards.get(shard_id)
+        if doc is not None:
+            self._shards.move_to_end(shard_id)
+            return doc
+        doc = self._read_shard(shard_id)
+        self._shards[shard_id] = doc
+        while len(self._shards) > self._max_resident:
+            _, evicted = self._shards.popitem(last=False)
+            for email_key in evicted.get("users") or {}:
+                self._stats.pop(email_key, None)
+                self._snapshots.pop(email_key, None)
+        return doc
+
+    def _save(self, email_key: str) -> None:
+        """Persist the shard holding ``email_key`` (it must be resident)."""
+        if not self._meta_written:
+            self._migrate_legacy()
+        shard_id = self._shard_of(email_key)
+        self._shard_versions[shard_id] = self._shard_versions.get(shard_id, 0) + 1
+        self._write_json(self._shard_path(shard_id), self._shard(shard_id))
+        if email_key not in self._known:
+            self._append_index([email_key])
+
+    def _user_stats(self, email_key: str, u: Dict[str, Any]) -> _UserStats:
+        stats = self._stats.get(email_key)
+        if stats is None:
+            stats = _UserStats.from_topics(u.get("topics") or {})
+            self._stats[email_key] = stats
+        return stats
 
     def _ensure_user(self, email: str) -> Dict[str, Any]:
-        email_key = (email or "guest@student.com").strip().lower()
-        users = self._data.setdefault("users", {})
+        email_key = _email_key(email)
+        users = self._shard(self._shard_of(email_key)).setdefault("users", {})
         u = users.get(email_key)
         if not u:
             u = {
                 "profile": asdict(UserProfile(email=email_key)),
                 "topics": {},
-                "events": [],
+                "events": _ring_new(),
             }
             users[email_key] = u
         if "profile" not in u:
             u["profile"] = asdict(UserProfile(email=email_key))
         if "topics" not in u:
             u["topics"] = {}
-        if "events" not in u:
-            u["events"] = []
+        if not isinstance(u.get("events"), dict):
+            u["events"] = _ring_from_legacy(u.get("events"))
         return u
 
+    # The *_locked helpers assume self._lock is held and do not persist; the
+    # public methods below compose them and persist once via _save().
+
+    def _upsert_profile_locked(
+        self,
+        email_key: str,
+        name: Optional[str] = None,
+        grade: Optional[str] = None,
+        preferred_language: Optional[str] = None,
+    ) -> UserProfile:
+        u = self._ensure_user(email_key)
+        prof = u.get("profile") or {}
+        if name is not None:
+            prof["name"] = name
+        if grade is not None:
+            prof["grade"] = grade
+        if preferred_language is not None:
+            prof["preferred_language"] = preferred_language
+        prof.setdefault("email", email_key)
+        u["profile"] = prof
+        self._snapshots.pop(email_key, None)
+        return UserProfile(**u["profile"])
+
+    def _record_attempt_locked(
+        self,
+        email_key: str,
+        topic: str,
+        correct: bool,
+        score: int,
+        question: Optional[str] = None,
+    ) -> TopicProgress:
+        topic_key = _safe_topic_key(topic)
+        u = self._ensure_user(email_key)
+        stats = self._user_stats(email_key, u)
+        topics = u.setdefault("topics", {})
+        old = dict(topics[topic_key]) if topic_key in topics else None
+        t = topics.get(topic_key) or {
+            "topic": topic_key,
+            "questions_answered": 0,
+            "correct": 0,
+            "score_total": 0,
+            "difficulty": 2,
+            "recent": 0,
+            "recent_n": 0,
+        }
+        if "recent_n" not in t:
+            _seed_window(t, u["events"], topic_key)
+
+        t["questions_answered"] = int(t.get("questions_answered") or 0) + 1
+        if correct:
+            t["correct"] = int(t.get("correct") or 0) + 1
+        t["score_total"] = int(t.get("score_total") or 0) + int(score or 0)
+
+        # Adaptive difficulty: bump up if accuracy is high, down if low,
+        # judged on this topic's own recent attempts.
+        adapt_difficulty(t, correct)
+        _ring_push(u["events"], [topic_key, 1 if correct else 0, int(score or 0), _question_ref(question)])
+
+        topics[topic_key] = t
+        u["topics"] = topics
+        stats.update_topic(topic_key, old, t)
+        self._snapshots.pop(email_key, None)
+        return _topic_progress(t)
+
+    def _snapshot_locked(self, email_key: str) -> Dict[str, Any]:
+        snapshot = self._snapshots.get(email_key)
+        if snapshot is not None:
+            return snapshot
+
+        u = self._ensure_user(email_key)
+        stats = self._user_stats(email_key, u)
+        profile = u.get("profile") or {}
+        topics = u.get("topics") or {}
+        events = u["events"]["items"]
+
+        feedback = generate_feedback(
+            profile=UserProfile(**profile),
+            topics=topics,
+            total_q=stats.total_q,
+            total_correct=stats.total_correct,
+            strengths=stats.strengths(),
+        )
+
+        snapshot = {
+            "profile": profile,
+            "progress": {
+                "topics": {
+                    key: {k: v for k, v in t.items() if k not in _WINDOW_FIELDS} for key, t in topics.items()
+                },
+                "total_questions": stats.total_q,
+                "total_correct": stats.total_correct,
+                "total_score": stats.total_score,
+            },
+            "feedback": feedback,
+            "recommended_difficulty": stats.median_difficulty(),
+            "events_count": len(events),
+        }
+        self._snapshots[email_key] = snapshot
+        return snapshot
+
     def upsert_profile(self, email: str, name: Optional[str] = None, grade: Optional[str] = None, preferred_language: Optional[str] = None) -> UserProfile:
         with self._lock:
-            u = self._ensure_user(email)
-            prof = u.get("profile") or {}
-            if name is not None:
-                prof["name"] = name
-            if grade is not None:
-                prof["grade"] = grade
-            if preferred_language is not None:
-                prof["preferred_language"] = preferred_language
-            prof.setdefault("email", (email or "guest@student.com").strip().lower())
-            u["profile"] = prof
-            self._save()
-            return UserProfile(**u["profile"])
+            email_key = _email_key(email)
+            prof = self._upsert_profile_locked(email_key, name=name, grade=grade, preferred_language=preferred_language)
+            self._save(email_key)
+            return prof
 
     def record_attempt(
         self,
@@ -121,102 +547,132 @@ class PersonalizationStore:
         question: Optional[str] = None,
     ) -> TopicProgress:
         """Record a single attempt and update adaptive difficulty."""
-        topic_key = _safe_topic_key(topic)
-
         with self._lock:
-            u = self._ensure_user(email)
-            topics = u.setdefault("topics", {})
-            t = topics.get(topic_key) or {
-                "topic": topic_key,
-                "questions_answered": 0,
-                "correct": 0,
-                "score_total": 0,
-                "difficulty": 2,
-            }
+            email_key = _email_key(email)
+            progress = self._record_attempt_locked(email_key, topic, correct, score, question)
+            self._save(email_key)
+            return progress
 
-            t["questions_answered"] = int(t.get("questions_answered") or 0) + 1
-            if correct:
-                t["correct"] = int(t.get("correct") or 0) + 1
-            t["score_total"] = int(t.get("score_total") or 0) + int(score or 0)
-
-            # Adaptive difficulty: bump up if accuracy is high, down if low.
-            # We use a short window approximation: last N attempts is stored as events.
-            u.setdefault("events", []).append(
-                {
-                    "topic": topic_key,
-                    "correct": bool(correct),
-                    "score": int(score or 0),
-                    "question": (question or "")[:500],
-                }
-            )
-            # Keep events bounded.
-            if len(u["events"]) > 200:
-                u["events"] = u["events"][-200:]
-
-            recent = [e for e in u["events"][-25:] if e.get("topic") == topic_key]
-            if recent:
-                acc = sum(1 for e in recent if e.get("correct")) / len(recent)
-                diff = int(t.get("difficulty") or 2)
-                if len(recent) >= 5:
-                    if acc >= 0.8:
-                        diff += 1
-                    elif acc <= 0.45:
-                        diff -= 1
-                t["difficulty"] = int(_clamp(diff, 1, 5))
-
-            topics[topic_key] = t
-            u["topics"] = topics
-            self._save()
-            return TopicProgress(**t)
+    def save_progress(
+        self,
+        email: str,
+        topic: str,
+        correct: bool,
+        score: int,
+        question: Optional[str] = None,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[TopicProgress, Dict[str, Any]]:
+        """Apply an optional profile update and one attempt as a single transaction.
+
+        Equivalent to upsert_profile + record_attempt + get_user_snapshot, but
+        takes the lock once and writes the file once.
+        """
+        email_key = _email_key(email)
+        with self._lock:
+            if profile:
+                self._upsert_profile_locked(
+                    email_key,
+                    name=profile.get("name"),
+                    grade=profile.get("grade"),
+                    preferred_language=profile.get("preferred_language"),
+                )
+            progress = self._record_attempt_locked(email_key, topic, correct, score, question)
+            self._save(email_key)
+            return progress, self._snapshot_locked(email_key)
 
     def get_user_snapshot(self, email: str) -> Dict[str, Any]:
         with self._lock:
-            u = self._ensure_user(email)
-            profile = u.get("profile") or {}
-            topics = u.get("topics") or {}
-            events = u.get("events") or []
-
-            # Aggregate overall stats
-            total_q = sum(int(t.get("questions_answered") or 0) for t in topics.values())
-            total_correct = sum(int(t.get("correct") or 0) for t in topics.values())
-            total_score = sum(int(t.get("score_total") or 0) for t in topics.values())
-
-            feedback = generate_feedback(
-                profile=UserProfile(**profile),
-                topics=topics,
-                total_q=total_q,
-                total_correct=total_correct,
-            )
+            return self._snapshot_locked(_email_key(email))
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count
+
+    @property
+    def shard_dir(self) -> str:
+        return self._dir
+
+    def _shard_stamp(self, shard_id: int) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._shard_path(shard_id))
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def shard_versions(self) -> List[Tuple[int, Optional[Tuple[int, int, int]]]]:
+        """Per-shard ``(write counter, file stamp)`` pairs, for caching per-shard derived data.
+
+        The counter is process-local; the stamp is the shard file's (inode,
+        mtime_ns, size), or None if it does not exist yet. Shard files are
+        replaced on every write, so the stamp also moves when another
+        process writes the shard.
+        """
+        with self._lock:
+            return [(self._shard_versions.get(i, 0), self._shard_stamp(i)) for i in range(self._shard_count)]
+
+    def export_topic_columns(self, shard_id: int) -> Dict[str, Any]:
+        """Flatten one shard's topic progress into parallel columns, one row per (user, topic).
 
+        Used by cohort_analytics to build users x topics arrays without
+        walking the nested user documents itself. Shards that are not resident
+        are read from disk without being paged into the cache.
+        """
+        with self._lock:
+            # Stamp before reading, so a concurrent write elsewhere can only
+            # make the block look older than it is.
+            version = (self._shard_versions.get(shard_id, 0), self._shard_stamp(shard_id))
+            doc = self._shards.get(shard_id)
+            if doc is None:
+                doc = self._read_shard(shard_id)
+            emails: List[str] = []
+            topic_index: Dict[str, int] = {}
+            user_idx: List[int] = []
+            topic_idx: List[int] = []
+            answered: List[int] = []
+            correct: List[int] = []
+            score: List[int] = []
+            difficulty: List[int] = []
+            for email_key, u in (doc.get("users") or {}).items():
+                row = len(emails)
+                emails.append(email_key)
+                for key, t in (u.get("topics") or {}).items():
+                    col = topic_index.setdefault(key, len(topic_index))
+                    user_idx.append(row)
+                    topic_idx.append(col)
+                    answered.append(int(t.get("questions_answered") or 0))
+                    correct.append(int(t.get("correct") or 0))
+                    score.append(int(t.get("score_total") or 0))
+                    difficulty.append(int(t.get("difficulty") or 2))
             return {
-                "profile": profile,
-                "progress": {
-                    "topics": topics,
-                    "total_questions": total_q,
-                    "total_correct": total_correct,
-                    "total_score": total_score,
-                },
-                "feedback": feedback,
-                "recommended_difficulty": recommend_difficulty(topics),
-                "events_count": len(events),
+                "version": version,
+                "emails": emails,
+                "topics": list(topic_index),
+                "user_idx": user_idx,
+                "topic_idx": topic_idx,
+                "answered": answered,
+                "correct": correct,
+                "score": score,
+                "difficulty": difficulty,
             }
 
     def reset_user(self, email: str) -> None:
         with self._lock:
-            email_key = (email or "guest@student.com").strip().lower()
-            users = self._data.setdefault("users", {})
+            email_key = _email_key(email)
+            users = self._shard(self._shard_of(email_key)).setdefault("users", {})
             # Keep profile but clear learning data.
             if email_key not in users:
                 users[email_key] = {
                     "profile": asdict(UserProfile(email=email_key)),
                     "topics": {},
-                    "events": [],
+                    "events": _ring_new(),
                 }
             else:
                 users[email_key].setdefault("profile", asdict(UserProfile(email=email_key)))
                 users[email_key]["topics"] = {}
-                users[email_key]["events"] = []
-            self._save()
+                users[email_key]["events"] = _ring_new()
+            self._stats.pop(email_key, None)
+            self._snapshots.pop(email_key, None)
+            self._save(email_key)
 
 
 def recommend_difficulty(topics: Dict[str, Any]) -> int:
@@ -244,9 +700,15 @@ def _topic_strengths(topics: Dict[str, Any]) -> Tuple[List[str], List[str]]:
     return strong, weak
 
 
-def generate_feedback(profile: UserProfile, topics: Dict[str, Any], total_q: int, total_correct: int) -> Dict[str, str]:
+def generate_feedback(
+    profile: UserProfile,
+    topics: Dict[str, Any],
+    total_q: int,
+    total_correct: int,
+    strengths: Optional[Tuple[List[str], List[str]]] = None,
+) -> Dict[str, str]:
     lang = (profile.preferred_language or "English").strip()
-    strong, weak = _topic_strengths(topics)
+    strong, weak = strengths if strengths is not None else _topic_strengths(topics)
 
     if total_q <= 0:
         if lang == "Sinhala":
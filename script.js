@@ -395,15 +395,22 @@
     } catch (e) {}
   }
 
+  // Instant check while typing; /ask also reports exam_mode_triggered from the
+  // server-side matcher (exam_mode/intent_matcher.py), which is authoritative.
+  // Same rule as the server: substring match after dropping zero-width
+  // joiners and collapsing whitespace.
   function detectExamModeTrigger(text){
-    const t = String(text || '').toLowerCase();
+    const t = String(text || '').replace(/[\u200c\u200d]/g, '').replace(/\s+/g, ' ').toLowerCase();
     if(!t) return false;
     const phrases = [
       'prepare me for my exam',
       'enable exam mode',
-      'exam mode',
+      'turn on exam mode',
+      'start exam mode',
       'prepare me for my third exam',
-      'i want to practice for my exam'
+      'i want to practice for my exam',
+      'practice for my exam',
+      'විභාගයට සූදානම්'
     ];
     return phrases.some(p => t.includes(p));
   }
@@ -753,6 +760,11 @@
       const answer = answerRaw ? stripAwardPointsLine(answerRaw) : '⚠️ AI returned an empty response.';
       if(lastAi) lastAi.content=answer; emitProgressEvent('g9:ai_response', { chatId: state.active, subject: state.subject, text: answer });
       renderActiveChat(); saveChats(); 
+      try {
+        if(data && data.exam_mode_triggered && window.ExamModeContext && window.ExamModeContext.getEnabled && window.ExamModeContext.setEnabled && !window.ExamModeContext.getEnabled()){
+          window.ExamModeContext.setEnabled(true);
+        }
+      } catch (e) {}
     }
     catch(e){ const msg=(e && e.message) ? ('⚠️ ' + String(e.message)) : '⚠️ Message failed to send. Please check your connection or try again later.'; const lastAi=[...chat.messages].reverse().find(m=>m.role==='ai'); if(lastAi) lastAi.content=msg; renderActiveChat(); saveChats(); toast(msg,{duration:5000}); }
   }
@@ -1,14 +1,16 @@
 import os
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
+from cohort_analytics import CohortAnalytics
 from personalization import PersonalizationStore
 
 
 DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personalization_data.json")
 store = PersonalizationStore(DATA_PATH)
+analytics = CohortAnalytics(store)
 
 router = APIRouter(prefix="/user", tags=["personalization"])
 
@@ -41,23 +43,14 @@ class ResetProgressPayload(BaseModel):
 async def save_progress(req: SaveProgressPayload):
     email = (req.email or "guest@student.com").strip().lower()
 
-    if req.profile:
-        store.upsert_profile(
-            email=email,
-            name=req.profile.get("name"),
-            grade=req.profile.get("grade"),
-            preferred_language=req.profile.get("preferred_language"),
-        )
-
-    topic_progress = store.record_attempt(
+    topic_progress, snapshot = store.save_progress(
         email=email,
         topic=req.topic,
         correct=bool(req.correct),
         score=int(req.score or 0),
         question=req.question,
+        profile=req.profile,
     )
-
-    snapshot = store.get_user_snapshot(email)
     return {"ok": True, "topic_progress": topic_progress.__dict__, "snapshot": snapshot}
 
 
@@ -79,3 +72,16 @@ async def set_profile(req: ProfilePayload):
     email = (req.email or "guest@student.com").strip().lower()
     prof = store.upsert_profile(email=email, name=req.name, grade=req.grade, preferred_language=req.preferred_language)
     return {"ok": True, "profile": prof.__dict__}
+
+
+@router.get("/cohort_stats")
+def cohort_stats(
+    emails: Optional[str] = None,
+    weakest: int = Query(5, ge=0, le=100),
+    min_answered: int = Query(1, ge=1, le=10_000),
+    bins: int = Query(10, ge=1, le=100),
+):
+    # Plain def: the aggregation is CPU-bound, so let it run on the threadpool.
+    selected = [e for e in (emails or "").split(",") if e.strip()] or None
+    data = analytics.stats(emails=selected, weakest=weakest, min_answered=min_answered, bins=bins)
+    return {"ok": True, "data": data}